@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AdminStatsView, AdminUserViewSet, AdminBookingViewSet
+from .views import AdminStatsView, AdminPerfView, AdminUserViewSet, AdminBookingViewSet
 
 router = DefaultRouter()
 router.register(r'users', AdminUserViewSet, basename='admin-users')
@@ -8,5 +8,6 @@ router.register(r'bookings', AdminBookingViewSet, basename='admin-bookings')
 
 urlpatterns = [
     path('stats/', AdminStatsView.as_view(), name='admin-stats'),
+    path('perf/', AdminPerfView.as_view(), name='admin-perf'),
     path('', include(router.urls)),
 ]
@@ -11,6 +11,8 @@ from apps.bookings.models import Booking
 from apps.users.serializers import UserProfileSerializer
 from apps.bookings.serializers import BookingSerializer
 from apps.subscriptions.models import Subscription
+from core import perf
+from core.mixins import EagerLoadingMixin
 
 User = get_user_model()
 
@@ -49,6 +51,18 @@ class AdminStatsView(APIView):
         })
 
 
+class AdminPerfView(APIView):
+    """Per-route latency percentiles from this worker's request samples"""
+    permission_classes = [permissions.IsAuthenticated, IsSuperUser]
+
+    def get(self, request):
+        return Response({'routes': perf.summary()})
+
+    def delete(self, request):
+        perf.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class AdminUserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('-date_joined')
     serializer_class = UserProfileSerializer
@@ -141,7 +155,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         return Response({'status': 'ok', 'is_active': user.is_active})
 
 
-class AdminBookingViewSet(viewsets.ReadOnlyModelViewSet):
+class AdminBookingViewSet(EagerLoadingMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Booking.objects.all().order_by('-created_at')
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated, IsSuperUser]
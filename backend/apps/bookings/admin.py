@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking, Notification
+from .models import Booking, Notification, OutboxMessage
 
 
 @admin.register(Booking)
@@ -54,3 +54,12 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ('title', 'message', 'user__username')
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Admin interface for the notification outbox"""
+    list_display = ('notification', 'channel', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'channel')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'sent_at')
@@ -0,0 +1,149 @@
+"""
+Time-window availability engine.
+
+Bookings in a reserving status form a per-tool reservation ledger, indexed on
+(tool_id, start_datetime, end_datetime) and restricted to live statuses so
+returned/cancelled history never enters the index; pending requests whose
+hold has expired are skipped (apps.bookings.holds). The free units for a
+window are the tool's quantity_total minus the peak number of units reserved
+at any instant inside that window.
+
+Tool.quantity_available tracks the units physically on hand right now: it is
+decremented when a booking becomes active and restored when it ends, so
+future bookings no longer make a tool look out of stock today.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from django.db.models import F
+from django.db.models.functions import Greatest, Least, Now
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.bookings.holds import live_reservations_q
+from apps.bookings.models import Booking
+from apps.tools.models import Tool
+from core.cache import bump
+
+# Statuses that hold units for their time window
+RESERVING_STATUSES = ('pending', 'confirmed', 'active')
+
+
+def overlapping_reservations(tool_ids, start, end):
+    """Reservations of ``tool_ids`` that overlap [start, end), minus expired holds"""
+    return Booking.objects.filter(
+        live_reservations_q(),
+        tool_id__in=tool_ids,
+        status__in=RESERVING_STATUSES,
+        start_datetime__lt=end,
+        end_datetime__gt=start,
+    )
+
+
+def peak_reserved(intervals, start, end):
+    """
+    Return the maximum number of units reserved at any instant of
+    [start, end), given (start, end, quantity) intervals.
+    """
+    events = []
+    for res_start, res_end, quantity in intervals:
+        events.append((max(res_start, start), quantity))
+        events.append((min(res_end, end), -quantity))
+
+    # Releases sort before reservations at the same instant (end is exclusive)
+    events.sort(key=lambda event: (event[0], event[1]))
+    peak = current = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+def reserved_units(tool_id, start, end):
+    """Peak units of ``tool_id`` reserved during [start, end), in one indexed query"""
+    intervals = overlapping_reservations([tool_id], start, end).values_list(
+        'start_datetime', 'end_datetime', 'quantity'
+    )
+    return peak_reserved(intervals, start, end)
+
+
+def free_units(tool, start, end):
+    """Units of ``tool`` that can still be booked for the whole of [start, end)"""
+    return max(tool.quantity_total - reserved_units(tool.id, start, end), 0)
+
+
+def daily_free_units(tools, first_day, last_day):
+    """
+    Free units per calendar day (in the current timezone) for each tool,
+    from a single query over the overlapping reservations of all tools.
+    Returns {tool_id: [free units for first_day, ..., last_day]}.
+    """
+    tz = timezone.get_current_timezone()
+    day_count = (last_day - first_day).days + 1
+    boundaries = [
+        timezone.make_aware(datetime.combine(first_day + timedelta(days=i), time.min), tz)
+        for i in range(day_count + 1)
+    ]
+
+    intervals = defaultdict(list)
+    rows = overlapping_reservations(
+        [tool.id for tool in tools], boundaries[0], boundaries[-1]
+    ).values_list('tool_id', 'start_datetime', 'end_datetime', 'quantity')
+    for tool_id, res_start, res_end, quantity in rows:
+        intervals[tool_id].append((res_start, res_end, quantity))
+
+    calendar = {}
+    for tool in tools:
+        tool_intervals = intervals.get(tool.id, [])
+        free = []
+        for day_start, day_end in zip(boundaries, boundaries[1:]):
+            day_intervals = [
+                interval for interval in tool_intervals
+                if interval[0] < day_end and interval[1] > day_start
+            ]
+            reserved = peak_reserved(day_intervals, day_start, day_end)
+            free.append(max(tool.quantity_total - reserved, 0))
+        calendar[tool.id] = free
+    return calendar
+
+
+def check_out_units(tool_id, quantity):
+    """Units leave the shelf when a booking becomes active"""
+    Tool.objects.filter(id=tool_id).update(
+        quantity_available=Greatest(F('quantity_available') - quantity, 0),
+        updated_at=Now(),
+    )
+    bump('tools')
+
+
+def check_in_units(tool_id, quantity):
+    """Units go back on the shelf when an active booking ends"""
+    Tool.objects.filter(id=tool_id).update(
+        quantity_available=Least(F('quantity_available') + quantity, F('quantity_total')),
+        updated_at=Now(),
+    )
+    bump('tools')
+
+
+def parse_window(start_value, end_value):
+    """
+    Parse ISO 8601 start/end strings into aware datetimes.
+    Returns (start, end, error) where error is a message or None.
+    """
+    if not start_value or not end_value:
+        return None, None, 'start and end parameters required'
+
+    try:
+        start = parse_datetime(start_value)
+        end = parse_datetime(end_value)
+    except ValueError:
+        start = end = None
+    if start is None or end is None:
+        return None, None, 'Invalid start or end datetime'
+
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+
+    if start >= end:
+        return None, None, 'End time must be after start time'
+    return start, end, None
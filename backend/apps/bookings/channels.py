@@ -0,0 +1,42 @@
+"""
+Delivery channels for notifications.
+
+A channel has a unique ``name`` and a ``send(notification)`` method that
+raises on failure (the outbox worker then retries with backoff). Enable
+channels with the NOTIFICATION_CHANNELS setting (dotted class paths).
+"""
+import logging
+from django.conf import settings
+from django.core.mail import send_mail
+
+logger = logging.getLogger(__name__)
+
+
+class LogChannel:
+    """Writes notifications to the application log (development default)"""
+
+    name = 'log'
+
+    def send(self, notification):
+        logger.info(
+            'Notification %s for user %s: %s', notification.id,
+            notification.user_id, notification.title
+        )
+
+
+class EmailChannel:
+    """Emails the notification to the user through Django's email backend"""
+
+    name = 'email'
+
+    def send(self, notification):
+        email = notification.user.email
+        if not email:
+            return
+        send_mail(
+            subject=notification.title,
+            message=notification.message,
+            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None),
+            recipient_list=[email],
+            fail_silently=False,
+        )
@@ -0,0 +1,252 @@
+"""
+Live events for the server-sent events stream (``GET /api/events/``).
+
+``publish()`` appends ``UserEvent`` rows in the caller's transaction and,
+once it commits, wakes the streams of those users that are open in this
+process (a lightweight in-process pub/sub). Streams served by another
+process pick the rows up on their next poll, one indexed
+``user_id = ? AND id > ?`` query every EVENT_STREAM_POLL_SECONDS, so the
+stream works whether the writes come from the ASGI app itself or from the
+WSGI workers next to it.
+
+The row id is the SSE event id: a reconnecting client sends it back as
+``Last-Event-ID`` and receives everything it missed. Rows older than
+EVENT_RETENTION_HOURS are purged by ``manage.py dispatch_notifications``.
+
+Browsers cannot send an Authorization header with EventSource, so they
+open the stream with a stream ticket instead of their access token: a
+signed, single-use value valid for EVENT_STREAM_TICKET_SECONDS that only
+opens the stream (``issue_ticket`` / ``redeem_ticket``). Single use is
+enforced through the cache, so across workers it needs a shared cache
+(REDIS_URL).
+"""
+import asyncio
+import json
+import secrets
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+# Events sent per poll; the rest follow immediately on the next one
+BATCH_SIZE = 100
+
+TICKET_SALT = 'apps.bookings.events.ticket'
+
+
+class Broker:
+    """Per-process registry of open streams, keyed by user id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = defaultdict(set)
+
+    def subscribe(self, user_id):
+        """Register the calling stream; returns its wake-up event"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[user_id].add(waiter)
+        return waiter
+
+    def unsubscribe(self, user_id, waiter):
+        with self._lock:
+            waiters = self._waiters.get(user_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[user_id]
+
+    def wake(self, user_ids):
+        """Wake the streams of ``user_ids``; safe to call from any thread"""
+        with self._lock:
+            waiters = [w for user_id in user_ids for w in self._waiters.get(user_id, ())]
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed; the stream is going away
+                pass
+
+
+broker = Broker()
+
+
+def publish(events):
+    """
+    Append (user_id, type, payload) ``events`` to the event log and wake
+    the affected streams after commit
+    """
+    from apps.bookings.models import UserEvent
+
+    rows = [UserEvent(user_id=user_id, type=type, payload=payload) for user_id, type, payload in events]
+    if not rows:
+        return
+    UserEvent.objects.bulk_create(rows)
+    user_ids = {row.user_id for row in rows}
+    transaction.on_commit(lambda: broker.wake(user_ids))
+
+
+def publish_notifications(notifications):
+    publish([
+        (n.user_id, 'notification', {
+            'id': n.id,
+            'type': n.type,
+            'title': n.title,
+            'message': n.message,
+            'related_object_id': n.related_object_id,
+            'created_at': n.created_at,
+        })
+        for n in notifications
+    ])
+
+
+def booking_status_events(booking, previous_status):
+    """Events announcing a booking status change to the renter and the shop owner"""
+    payload = {
+        'id': booking.id,
+        'status': booking.status,
+        'previous_status': previous_status,
+        'payment_status': booking.payment_status,
+        'tool_id': booking.tool_id,
+        'shop_id': booking.shop_id,
+        'updated_at': booking.updated_at,
+    }
+    recipients = {booking.renter_id, booking.shop.owner_id}
+    return [(user_id, 'booking', payload) for user_id in recipients]
+
+
+def publish_booking_status(booking, previous_status):
+    publish(booking_status_events(booking, previous_status))
+
+
+def purge_events(older_than):
+    """Delete events created before ``older_than``"""
+    from apps.bookings.models import UserEvent
+    return UserEvent.objects.filter(created_at__lt=older_than).delete()[0]
+
+
+def latest_event_id(user_id):
+    from apps.bookings.models import UserEvent
+    return UserEvent.objects.filter(user_id=user_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def events_after(user_id, last_id):
+    from apps.bookings.models import UserEvent
+    return list(
+        UserEvent.objects.filter(user_id=user_id, id__gt=last_id)
+        .order_by('id')
+        .values_list('id', 'type', 'payload')[:BATCH_SIZE]
+    )
+
+
+def format_event(event_id, type, payload):
+    data = json.dumps(payload, cls=DjangoJSONEncoder)
+    return f'id: {event_id}\nevent: {type}\ndata: {data}\n\n'
+
+
+def issue_ticket(user_id, expires_at):
+    """
+    A stream ticket for ``user_id``; the stream it opens ends at
+    ``expires_at`` (unix time), normally the expiry of the access token
+    that requested it
+    """
+    return signing.dumps(
+        {'user': str(user_id), 'exp': int(expires_at), 'nonce': secrets.token_urlsafe(12)},
+        salt=TICKET_SALT
+    )
+
+
+def redeem_ticket(ticket):
+    """
+    Return (user id, expires_at) for a valid, unused ticket of an active
+    user and mark it used; None otherwise
+    """
+    from django.contrib.auth import get_user_model
+
+    max_age = settings.EVENT_STREAM_TICKET_SECONDS
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT, max_age=max_age)
+    except signing.BadSignature:
+        return None
+    if not cache.add(f'stream-ticket:{data["nonce"]}', 1, timeout=max_age):
+        return None
+    user_id = get_user_model().objects.filter(
+        pk=data['user'], is_active=True
+    ).values_list('pk', flat=True).first()
+    if user_id is None:
+        return None
+    return user_id, data['exp']
+
+
+def stream_once(user_id, last_id):
+    """
+    Synchronous ``stream()`` for WSGI, which cannot hold connections open:
+    the pending events, then the response ends and the client reconnects
+    after the advertised retry delay
+    """
+    yield f'retry: {settings.EVENT_STREAM_RETRY_MS}\n\n'
+    if last_id is None:
+        yield f'id: {latest_event_id(user_id)}\n\n'
+        return
+    while True:
+        events = events_after(user_id, last_id)
+        for event_id, type, payload in events:
+            yield format_event(event_id, type, payload)
+            last_id = event_id
+        if len(events) < BATCH_SIZE:
+            return
+
+
+async def stream(user_id, last_id, expires_at, instrument=None):
+    """
+    Yield SSE frames for ``user_id`` after event ``last_id`` until
+    ``expires_at`` (event loop time), when the client reconnects with a
+    fresh ticket and its Last-Event-ID. Pending events are always sent once,
+    even if ``expires_at`` has already passed. ``instrument`` wraps the
+    database reads (e.g. to count them towards the request).
+    """
+    from asgiref.sync import sync_to_async
+
+    instrument = instrument or (lambda func: func)
+    fetch = sync_to_async(instrument(events_after))
+    poll = settings.EVENT_STREAM_POLL_SECONDS
+    keepalive = settings.EVENT_STREAM_KEEPALIVE_SECONDS
+    loop = asyncio.get_running_loop()
+
+    waiter = broker.subscribe(user_id)
+    _, wake = waiter
+    try:
+        yield f'retry: {settings.EVENT_STREAM_RETRY_MS}\n\n'
+        if last_id is None:
+            # New clients start from now; an id-only frame sets the position
+            # they resume from without dispatching an event
+            last_id = await sync_to_async(instrument(latest_event_id))(user_id)
+            yield f'id: {last_id}\n\n'
+        idle = 0.0
+        while True:
+            wake.clear()
+            events = await fetch(user_id, last_id)
+            for event_id, type, payload in events:
+                yield format_event(event_id, type, payload)
+                last_id = event_id
+            if len(events) == BATCH_SIZE:
+                continue
+            if events:
+                idle = 0.0
+
+            started = loop.time()
+            remaining = expires_at - started
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=min(poll, keepalive - idle, remaining))
+            except asyncio.TimeoutError:
+                idle += loop.time() - started
+                if idle >= keepalive:
+                    idle = 0.0
+                    yield ': keepalive\n\n'
+    finally:
+        broker.unsubscribe(user_id, waiter)
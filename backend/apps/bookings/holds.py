@@ -0,0 +1,79 @@
+"""
+Expiring holds for pending bookings.
+
+A new pending booking reserves its window in the availability ledger only
+until ``hold_expires_at`` (BOOKING_HOLD_MINUTES after the request). Reads
+never wait for cleanup: ``live_reservations_q`` drops expired holds from
+every availability query, and an expired request can no longer be
+confirmed. ``release_expired_holds()``, run by ``manage.py
+release_expired_holds``, then cancels them in bulk and tells both sides.
+
+Pending bookings never take units off the shelf (``quantity_available``
+changes only when a booking becomes active), so releasing a hold needs no
+inventory update.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Now
+from django.utils import timezone
+
+
+def hold_deadline():
+    return timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+
+
+def live_reservations_q(prefix=''):
+    """Excludes pending bookings whose hold has expired"""
+    return ~Q(**{
+        f'{prefix}status': 'pending',
+        f'{prefix}hold_expires_at__lte': Now(),
+    })
+
+
+def release_expired_holds(batch_size=500):
+    """
+    Cancel one batch of pending bookings whose hold has expired with a
+    single UPDATE, notify the renters and publish the status changes.
+    Rows are locked (SKIP LOCKED where supported) so a concurrent confirm
+    or another sweeper never races the update. Returns the number released.
+    """
+    from apps.bookings.events import booking_status_events, publish
+    from apps.bookings.models import Booking, Notification
+    from apps.bookings.notifications import notify_many
+
+    now = timezone.now()
+    with transaction.atomic():
+        expired = Booking.objects.filter(
+            status='pending', hold_expires_at__lte=now
+        ).select_related('tool', 'shop').order_by('hold_expires_at')
+        if connection.features.has_select_for_update_skip_locked:
+            expired = expired.select_for_update(skip_locked=True, of=('self',))
+        else:
+            expired = expired.select_for_update()
+        bookings = list(expired[:batch_size])
+        if not bookings:
+            return 0
+
+        Booking.objects.filter(id__in=[b.id for b in bookings]).update(
+            status='cancelled', hold_expires_at=None, updated_at=now
+        )
+        events = []
+        for booking in bookings:
+            booking.status = 'cancelled'
+            booking.hold_expires_at = None
+            booking.updated_at = now
+            events.extend(booking_status_events(booking, 'pending'))
+        publish(events)
+        notify_many([
+            Notification(
+                user_id=booking.renter_id,
+                type='booking',
+                title='Booking Request Expired',
+                message=f'Your booking request for {booking.tool.name} was not confirmed in time and has been released.',
+                related_object_id=str(booking.id),
+            )
+            for booking in bookings
+        ])
+    return len(bookings)
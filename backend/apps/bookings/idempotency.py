@@ -0,0 +1,123 @@
+"""
+Idempotency keys for retried writes.
+
+Views decorated with ``@idempotent`` honour an ``Idempotency-Key`` header.
+The first request with a key claims it by inserting an ``IdempotencyKey``
+row (unique on user and key) before running the view, then stores the
+response on it. A retry with the same key is answered from that row with a
+single indexed lookup and never reaches the write path:
+
+* same request, finished: the stored response, with ``Idempotent-Replayed: true``
+* same request, still running: 409
+* different method, path or body: 422
+
+Server errors (5xx) and exceptions release the key so the client can retry.
+A claim left behind by a crashed worker is taken over after
+IDEMPOTENCY_LOCK_SECONDS. Rows expire after IDEMPOTENCY_KEY_TTL_HOURS; a
+retry after that runs the view again, and ``purge_expired_keys()`` (run by
+``manage.py release_expired_holds``) deletes them.
+"""
+import functools
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _claim(user, key, fingerprint):
+    """Insert the key; returns (record, True) or (existing record, False)"""
+    from apps.bookings.models import IdempotencyKey
+
+    now = timezone.now()
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+                ), True
+        except IntegrityError:
+            pass
+        existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if existing is None:
+            continue
+        stale = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+        # Expired rows and abandoned claims are deleted (conditionally, so
+        # only one retry wins) and the key is claimed again
+        released = IdempotencyKey.objects.filter(pk=existing.pk).filter(
+            Q(expires_at__lte=now) | Q(status='processing', created_at__lt=stale)
+        ).delete()[0]
+        if not released:
+            return existing, False
+    return existing, False
+
+
+def idempotent(view):
+    """Decorate a ViewSet method to honour the Idempotency-Key header"""
+
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request)
+        record, claimed = _claim(request.user, key, fingerprint)
+        if not claimed:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {'error': f'{HEADER} was already used for a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status == 'processing':
+                return Response(
+                    {'error': f'A request with this {HEADER} is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            response = Response(record.response_body, status=record.response_status)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = view(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+            return response
+
+        record.status = 'completed'
+        record.response_status = response.status_code
+        record.response_body = response.data
+        record.save(update_fields=['status', 'response_status', 'response_body'])
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys():
+    """Delete expired keys; returns the number deleted"""
+    from apps.bookings.models import IdempotencyKey
+    return IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()[0]
@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.bookings.events import purge_events
+from apps.bookings.notifications import dispatch_pending, purge_sent
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued notifications to the configured channels in batches, "
+        "retrying failures with backoff, and purge old sent messages and "
+        "live events. Run from cron, or with --loop as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep running, polling every --interval seconds')
+        parser.add_argument('--interval', type=int, default=5)
+        parser.add_argument('--keep-days', type=int, default=7, help='Delete sent messages older than this')
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while True:
+                processed = dispatch_pending(options['batch_size'])
+                total += processed
+                if processed < options['batch_size']:
+                    break
+            if total:
+                self.stdout.write(f"Processed {total} outbox message(s)")
+            purge_sent(timezone.now() - timedelta(days=options['keep_days']))
+            purge_events(timezone.now() - timedelta(hours=settings.EVENT_RETENTION_HOURS))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.bookings.holds import release_expired_holds
+from apps.bookings.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancel pending booking requests whose hold has expired, notify the "
+        "renters and evict expired idempotency keys. Run from cron, or with "
+        "--loop as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep running, sweeping every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60)
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while True:
+                released = release_expired_holds(options['batch_size'])
+                total += released
+                if released < options['batch_size']:
+                    break
+            if total:
+                self.stdout.write(f"Released {total} expired booking hold(s)")
+            purge_expired_keys()
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
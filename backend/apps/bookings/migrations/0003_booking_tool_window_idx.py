@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_initial'),
+        ('shops', '0004_shop_location_point'),
+        ('tools', '0003_seed_tool_categories'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed', 'active'])), fields=['tool', 'start_datetime', 'end_datetime'], name='bookings_tool_window_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:20
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def hold_pending_bookings(apps, schema_editor):
+    """Existing pending requests get a fresh hold rather than none"""
+    Booking = apps.get_model('bookings', 'Booking')
+    Booking.objects.filter(status='pending').update(
+        hold_expires_at=timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_user_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['hold_expires_at'], name='bookings_pending_hold_idx'),
+        ),
+        migrations.RunPython(hold_pending_bookings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='claim',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -1,6 +1,9 @@
 import uuid
+from decimal import Decimal
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from apps.tools.models import Tool
 from apps.shops.models import Shop
@@ -64,7 +67,7 @@ class Booking(models.Model):
     deposit_amount = models.DecimalField(
         max_digits=10,
         decimal_places=2,
-        default=0.00,
+        default=Decimal('0.00'),
         validators=[MinValueValidator(0.00)]
     )
     total_amount = models.DecimalField(
@@ -94,6 +97,10 @@ class Booking(models.Model):
     razorpay_order_id = models.CharField(max_length=100, null=True, blank=True)
     razorpay_payment_id = models.CharField(max_length=100, null=True, blank=True)
     
+    # Pending requests reserve their window only until the hold expires
+    # (apps.bookings.holds); cleared once the booking leaves pending
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    
     # Pickup/return times
     pickup_time = models.DateTimeField(null=True, blank=True)
     return_time = models.DateTimeField(null=True, blank=True)
@@ -113,13 +120,50 @@ class Booking(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['start_datetime']),
             models.Index(fields=['-created_at']),
+            # Reservation ledger for the availability engine: live bookings only,
+            # so historical returned/cancelled rows are never scanned
+            models.Index(
+                fields=['tool', 'start_datetime', 'end_datetime'],
+                condition=models.Q(status__in=['pending', 'confirmed', 'active']),
+                name='bookings_tool_window_idx',
+            ),
+            # Hold sweeper (apps.bookings.holds)
+            models.Index(
+                fields=['hold_expires_at'],
+                condition=models.Q(status='pending'),
+                name='bookings_pending_hold_idx',
+            ),
         ]
     
     def __str__(self):
         return f"Booking {self.id} - {self.tool.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status as loaded, so save() can announce transitions
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    @property
+    def hold_expired(self):
+        return (
+            self.status == 'pending'
+            and self.hold_expires_at is not None
+            and self.hold_expires_at <= timezone.now()
+        )
+    
     def save(self, *args, **kwargs):
         """Calculate total amount and validate dates"""
+        from apps.bookings.holds import hold_deadline
+        from apps.bookings.events import publish_booking_status
+        previous = getattr(self, '_loaded_status', None)
+        if self._state.adding and self.status == 'pending' and self.hold_expires_at is None:
+            self.hold_expires_at = hold_deadline()
+        elif self.status != 'pending' and self.hold_expires_at is not None:
+            self.hold_expires_at = None
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'hold_expires_at'}
         if self.start_datetime and self.end_datetime:
             # Calculate duration in hours
             duration = (self.end_datetime - self.start_datetime).total_seconds() / 3600
@@ -127,9 +171,13 @@ class Booking(models.Model):
             
             # rental_price is per-unit; multiply by quantity, then add deposit
             quantity = self.quantity or 1
-            self.total_amount = (self.rental_price * quantity) + self.deposit_amount
+            self.total_amount = Decimal(str(self.rental_price)) * quantity + Decimal(str(self.deposit_amount or 0))
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self.status != previous:
+                publish_booking_status(self, previous)
+        self._loaded_status = self.status
 
 
 class Notification(models.Model):
@@ -171,3 +219,128 @@ class Notification(models.Model):
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
+    
+    def save(self, *args, **kwargs):
+        """Count new unread notifications on the user's badge counter"""
+        from apps.bookings.events import publish_notifications
+        from apps.bookings.notifications import adjust_unread
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding and not self.is_read:
+                adjust_unread({self.user_id: 1})
+            if adding:
+                publish_notifications([self])
+
+
+class OutboxMessage(models.Model):
+    """
+    Pending delivery of a Notification to one external channel (email,
+    SMS, push, ...). Written in the same transaction as the notification and
+    drained by the dispatch_notifications worker (apps.bookings.notifications).
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='outbox_messages'
+    )
+    channel = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Dispatcher run currently delivering this message; its lease is
+    # next_attempt_at, after which another run may claim it again
+    claim = models.UUIDField(null=True, blank=True, editable=False, db_index=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel} - {self.notification_id} ({self.status})"
+
+
+class UserEvent(models.Model):
+    """
+    Append-only log of live events for one user, streamed by the
+    server-sent events endpoint (apps.bookings.events). The auto-increment
+    id is the SSE event id clients resume from with Last-Event-ID.
+    """
+    
+    TYPE_CHOICES = [
+        ('notification', 'Notification'),
+        ('booking', 'Booking'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='events'
+    )
+    type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'user_events'
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.type} #{self.id} for {self.user_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a write request sent with an ``Idempotency-Key``
+    header (apps.bookings.idempotency), so a retry gets the same response
+    instead of repeating the write. Expires after IDEMPOTENCY_KEY_TTL_HOURS.
+    """
+    
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255)
+    # sha256 of method, path and body: a key may not be reused for another request
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='processing')
+    response_status = models.IntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_keys_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} ({self.status})"
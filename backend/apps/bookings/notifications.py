@@ -0,0 +1,192 @@
+"""
+Transactional outbox for notifications.
+
+``notify()`` writes the in-app Notification and one OutboxMessage per
+configured external channel, bumps the user's unread counter and publishes
+a live event (apps.bookings.events). Call it inside the transaction that
+makes the change being announced: the rows commit (or roll back) with it
+and the request never waits on delivery.
+
+``dispatch_pending()`` is run by ``manage.py dispatch_notifications``: it
+claims due messages in batches, hands each to its channel and records the
+outcome, retrying failures with exponential backoff up to MAX_ATTEMPTS.
+Claiming is a short conditional UPDATE that stamps the batch with a claim
+token and pushes ``next_attempt_at`` out by CLAIM_LEASE_SECONDS; sending
+happens outside any transaction, so slow providers hold no locks, and a
+message is only sent by the run whose UPDATE claimed it. A run that dies
+mid-batch leaves its messages to be claimed again once the lease ends.
+"""
+import logging
+import uuid
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from apps.bookings.models import Notification, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+# How long a claimed batch is reserved for the run delivering it
+CLAIM_LEASE_SECONDS = 300
+
+_channels = None
+
+
+def get_channels():
+    """Return {name: channel} for settings.NOTIFICATION_CHANNELS"""
+    global _channels
+    if _channels is None:
+        channels = {}
+        for path in getattr(settings, 'NOTIFICATION_CHANNELS', []):
+            channel = import_string(path)()
+            channels[channel.name] = channel
+        _channels = channels
+    return _channels
+
+
+def adjust_unread(deltas):
+    """
+    Apply {user_id: delta} to the users' unread counters in one UPDATE,
+    never going below zero
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    change = Case(
+        *[When(pk=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    get_user_model().objects.filter(pk__in=deltas).update(
+        unread_notifications=Greatest(F('unread_notifications') + change, 0)
+    )
+
+
+def notify(user, type, title, message, related_object_id=''):
+    """Create an in-app notification and queue it for every delivery channel"""
+    notification = Notification.objects.create(
+        user=user,
+        type=type,
+        title=title,
+        message=message,
+        related_object_id=related_object_id,
+    )
+    OutboxMessage.objects.bulk_create([
+        OutboxMessage(notification=notification, channel=name)
+        for name in get_channels()
+    ])
+    return notification
+
+
+def notify_many(notifications):
+    """
+    Bulk version of notify() for unsaved Notification instances: one
+    INSERT for the notifications, one for their outbox messages, one for
+    their live events and one UPDATE for the unread counters.
+    """
+    from apps.bookings.events import publish_notifications
+    notifications = Notification.objects.bulk_create(notifications)
+    publish_notifications(notifications)
+    OutboxMessage.objects.bulk_create([
+        OutboxMessage(notification=notification, channel=name)
+        for notification in notifications
+        for name in get_channels()
+    ])
+    adjust_unread(Counter(n.user_id for n in notifications if not n.is_read))
+    return notifications
+
+
+def mark_read(user, notification_ids=None):
+    """
+    Mark the user's unread notifications (all, or ``notification_ids``) as
+    read and decrement the counter by the rows actually changed, so repeated
+    or concurrent calls never double-count. Returns that number.
+    """
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if notification_ids is not None:
+        unread = unread.filter(id__in=notification_ids)
+    with transaction.atomic():
+        changed = unread.update(is_read=True)
+        adjust_unread({user.pk: -changed})
+    return changed
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def deliver(message):
+    """Send one message through its channel and record the outcome"""
+    now = timezone.now()
+    message.attempts += 1
+    channel = get_channels().get(message.channel)
+    try:
+        if channel is None:
+            raise LookupError(f'Channel {message.channel!r} is not configured')
+        channel.send(message.notification)
+    except Exception as exc:
+        logger.warning('Delivery of outbox message %s failed: %s', message.id, exc)
+        message.last_error = str(exc)[:1000]
+        if message.attempts >= MAX_ATTEMPTS or channel is None:
+            message.status = 'failed'
+        else:
+            message.next_attempt_at = now + backoff(message.attempts)
+    else:
+        message.status = 'sent'
+        message.sent_at = now
+        message.last_error = ''
+    return message
+
+
+def claim_due(batch_size):
+    """
+    Claim up to ``batch_size`` due messages for this run and return them.
+    Rows another run claimed first are skipped, on every database.
+    """
+    token = uuid.uuid4()
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboxMessage.objects.filter(
+            status='pending', next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:batch_size])
+        # Conditional, so a concurrent run that read the same rows claims none of them
+        OutboxMessage.objects.filter(
+            id__in=ids, status='pending', next_attempt_at__lte=now
+        ).update(claim=token, next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS))
+    return list(
+        OutboxMessage.objects.filter(claim=token).select_related('notification__user').order_by('id')
+    )
+
+
+def dispatch_pending(batch_size=100):
+    """
+    Deliver one batch of due messages: claim them, send them outside any
+    transaction and record the outcomes. Several workers can run side by
+    side. Returns the number of messages processed.
+    """
+    batch = [deliver(message) for message in claim_due(batch_size)]
+    if batch:
+        token = batch[0].claim
+        for message in batch:
+            message.claim = None
+        # Only while still ours: after an expired lease another run owns them
+        OutboxMessage.objects.filter(claim=token).bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'claim']
+        )
+    return len(batch)
+
+
+def purge_sent(older_than):
+    """Delete delivered messages sent before ``older_than``"""
+    return OutboxMessage.objects.filter(status='sent', sent_at__lt=older_than).delete()[0]
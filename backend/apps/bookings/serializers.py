@@ -1,9 +1,14 @@
 from rest_framework import serializers
 from apps.bookings.models import Booking, Notification
+from apps.bookings.availability import free_units
+from apps.tools.pricing import RateTable
 from apps.tools.serializers import ToolSerializer
 from apps.shops.serializers import ShopSerializer
 from apps.users.serializers import UserSerializer
 
+# Most bookings changed by one bulk action
+BULK_MAX_IDS = 100
+
 
 class BookingSerializer(serializers.ModelSerializer):
     """Serializer for Booking model"""
@@ -20,14 +25,22 @@ class BookingSerializer(serializers.ModelSerializer):
             'rental_price', 'deposit_amount', 'total_amount',
             'status', 'payment_status', 'payment_method',
             'razorpay_order_id', 'razorpay_payment_id',
-            'pickup_time', 'return_time', 'notes',
+            'hold_expires_at', 'pickup_time', 'return_time', 'notes',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'renter', 'duration_hours', 'total_amount',
+            'id', 'renter', 'duration_hours', 'total_amount', 'hold_expires_at',
             'razorpay_order_id', 'razorpay_payment_id',
             'created_at', 'updated_at'
         ]
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset, prefix=''):
+        """Join renter/tool/shop and set up every nested serializer"""
+        queryset = queryset.select_related(f'{prefix}renter')
+        queryset = UserSerializer.setup_eager_loading(queryset, prefix=f'{prefix}renter__')
+        queryset = ToolSerializer.setup_eager_loading(queryset, prefix=f'{prefix}tool__')
+        return ShopSerializer.setup_eager_loading(queryset, prefix=f'{prefix}shop__')
 
 
 class BookingCreateSerializer(serializers.ModelSerializer):
@@ -41,6 +54,8 @@ class BookingCreateSerializer(serializers.ModelSerializer):
             'tool_id', 'quantity', 'start_datetime', 'end_datetime',
             'rental_price', 'deposit_amount', 'payment_method', 'notes'
         ]
+        # Priced from the tool's rates (apps.tools.pricing)
+        read_only_fields = ['rental_price', 'deposit_amount']
     
     def validate(self, attrs):
         """Validate booking data"""
@@ -61,12 +76,6 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if tool.shop.owner == renter:
             raise serializers.ValidationError({'tool_id': 'You cannot book your own tool'})
         
-        # Validate quantity
-        if tool.quantity_available < quantity:
-            raise serializers.ValidationError({
-                'quantity': f'Only {tool.quantity_available} available'
-            })
-        
         # Validate dates are not in the past
         from django.utils import timezone
         if start_time < timezone.now():
@@ -80,38 +89,58 @@ class BookingCreateSerializer(serializers.ModelSerializer):
                 'end_datetime': 'End time must be after start time'
             })
         
+        # Validate quantity against reservations overlapping the requested window
+        available = free_units(tool, start_time, end_time)
+        if available < quantity:
+            raise serializers.ValidationError({
+                'quantity': f'Only {available} available for the selected dates'
+            })
+        
         attrs['tool'] = tool
         attrs['shop'] = tool.shop
         
+        # rental_price is per unit; Booking.save multiplies it by quantity
+        rates = RateTable.for_tool(tool)
+        attrs['rental_price'], _ = rates.price(rates.billed_hours(start_time, end_time))
+        attrs['deposit_amount'] = rates.deposit_amount
+        
         return attrs
 
     
     def create(self, validated_data):
-        """Create booking and atomically decrement tool quantity"""
-        tool_id = validated_data.pop('tool_id')
+        """Create booking after re-checking window availability under a tool lock"""
+        validated_data.pop('tool_id')
         tool = validated_data['tool']
-        quantity = validated_data['quantity']
+        quantity = validated_data.get('quantity', 1)
         
-        # Atomic decrement to prevent race conditions (double-booking)
-        from django.db.models import F
+        # Lock the tool row so concurrent bookings for it are checked one at a time
+        from django.db import transaction
         from apps.tools.models import Tool
-        updated = Tool.objects.filter(
-            id=tool.id,
-            quantity_available__gte=quantity
-        ).update(quantity_available=F('quantity_available') - quantity)
-        
-        if not updated:
-            raise serializers.ValidationError({
-                'quantity': 'Tool is no longer available in requested quantity'
-            })
-        
-        # Create booking
-        validated_data['renter'] = self.context['request'].user
-        booking = super().create(validated_data)
+        with transaction.atomic():
+            Tool.objects.select_for_update().filter(id=tool.id).first()
+            available = free_units(tool, validated_data['start_datetime'], validated_data['end_datetime'])
+            if available < quantity:
+                raise serializers.ValidationError({
+                    'quantity': 'Tool is no longer available in requested quantity'
+                })
+            
+            # Create booking
+            validated_data['renter'] = self.context['request'].user
+            booking = super().create(validated_data)
         
         return booking
 
 
+class BulkBookingActionSerializer(serializers.Serializer):
+    """Booking IDs for a bulk provider action"""
+    
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=BULK_MAX_IDS
+    )
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     """Serializer for Notification model"""
     
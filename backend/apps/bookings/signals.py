@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from apps.bookings.notifications import adjust_unread
+
+
+@receiver(post_delete, sender='bookings.Notification')
+def remove_unread_notification(sender, instance, **kwargs):
+    # Also runs for queryset deletes and cascades from users
+    if not instance.is_read:
+        adjust_unread({instance.user_id: -1})
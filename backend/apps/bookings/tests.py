@@ -0,0 +1,63 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from apps.bookings import notifications
+from apps.bookings.models import Notification, OutboxMessage
+
+
+def make_user(username='renter'):
+    return get_user_model().objects.create_user(
+        username=username, email=f'{username}@example.com', password='x', user_type='renter'
+    )
+
+
+class DispatchPendingTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user()
+        self.notification = notifications.notify(self.user, 'booking', 'Booked', 'Your booking is confirmed')
+
+    def test_claimed_messages_are_not_claimed_again(self):
+        claimed = notifications.claim_due(10)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(notifications.claim_due(10), [])
+
+    def test_sends_once_and_records_the_outcome(self):
+        channel = mock.Mock()
+        with mock.patch.object(notifications, 'get_channels', return_value={'log': channel}):
+            self.assertEqual(notifications.dispatch_pending(), 1)
+            self.assertEqual(notifications.dispatch_pending(), 0)
+        channel.send.assert_called_once()
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts, message.claim), ('sent', 1, None))
+
+    def test_outcome_of_an_expired_claim_is_dropped(self):
+        claimed = notifications.claim_due(10)
+        # The lease ran out and another run took the message over
+        OutboxMessage.objects.update(claim=None)
+        with mock.patch.object(notifications, 'claim_due', return_value=claimed):
+            notifications.dispatch_pending()
+        self.assertEqual(OutboxMessage.objects.get().status, 'pending')
+
+
+class UnreadCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user()
+        for title in ('First', 'Second', 'Third'):
+            notifications.notify(self.user, 'booking', title, 'Booking update')
+
+    def unread(self):
+        self.user.refresh_from_db(fields=['unread_notifications'])
+        return self.user.unread_notifications
+
+    def test_deleting_unread_notifications_decrements(self):
+        Notification.objects.get(title='First').delete()
+        self.assertEqual(self.unread(), 2)
+        Notification.objects.filter(title='Second').delete()
+        self.assertEqual(self.unread(), 1)
+
+    def test_deleting_read_notification_keeps_counter(self):
+        notifications.mark_read(self.user, [Notification.objects.get(title='First').id])
+        Notification.objects.get(title='First').delete()
+        self.assertEqual(self.unread(), 2)
@@ -0,0 +1,158 @@
+"""
+Booking state machine.
+
+Every status change is one conditional ``UPDATE ... WHERE id = ? AND status
+IN (...)``; its row count says whether this request made the transition,
+so two concurrent requests (cancel and the payment webhook, a double
+confirm) can never both succeed. Inventory side effects run in the same
+transaction and only for the request whose UPDATE changed the row, so
+units are never checked out or restored twice. No row locks are taken.
+
+Each target status lists the edges leading to it: the statuses it may be
+reached from, the inventory effect and any extra condition. Edges are
+tried in order. ``transition_many`` applies the same edges to a set of
+bookings with one UPDATE per edge and one inventory update per tool; it
+locks the candidate rows first, so the rows it read are exactly the rows
+its UPDATE changes.
+"""
+from collections import Counter, namedtuple
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Now
+from django.utils import timezone
+from apps.bookings.availability import check_in_units, check_out_units
+from apps.bookings.models import Booking
+
+Edge = namedtuple('Edge', ['sources', 'inventory', 'condition'], defaults=[None, None])
+
+TRANSITIONS = {
+    # Expired holds cannot be confirmed (apps.bookings.holds)
+    'confirmed': [
+        Edge(('pending',), condition=Q(hold_expires_at__isnull=True) | Q(hold_expires_at__gt=Now())),
+    ],
+    # Units leave the shelf when a booking becomes active...
+    'active': [
+        Edge(('confirmed',), inventory=check_out_units),
+    ],
+    # ...and go back when an active booking ends
+    'cancelled': [
+        Edge(('active',), inventory=check_in_units),
+        Edge(('pending', 'confirmed')),
+    ],
+    'returned': [
+        Edge(('active',), inventory=check_in_units),
+    ],
+}
+
+
+def transition(booking, target, **fields):
+    """
+    Move ``booking`` to ``target`` if its current status allows it, writing
+    ``fields`` in the same UPDATE. Returns True if this call made the
+    change; the instance is then updated in memory and the change is
+    published to the renter and shop owner.
+    """
+    from apps.bookings.events import publish_booking_status
+
+    now = timezone.now()
+    with transaction.atomic():
+        for edge in TRANSITIONS[target]:
+            rows = Booking.objects.filter(pk=booking.pk, status__in=edge.sources)
+            if edge.condition is not None:
+                rows = rows.filter(edge.condition)
+            if rows.update(status=target, hold_expires_at=None, updated_at=now, **fields):
+                break
+        else:
+            return False
+
+        if edge.inventory is not None:
+            edge.inventory(booking.tool_id, booking.quantity)
+
+        previous = booking.status if booking.status in edge.sources else edge.sources[0]
+        booking.status = target
+        booking.hold_expires_at = None
+        booking.updated_at = now
+        for name, value in fields.items():
+            setattr(booking, name, value)
+        booking._loaded_status = target
+        publish_booking_status(booking, previous)
+    return True
+
+
+def transition_many(queryset, target, **fields):
+    """
+    Set-based ``transition()`` for the bookings in ``queryset``: per edge,
+    one locking read of the candidates, one UPDATE and one inventory
+    update per tool. Returns the bookings this call changed, updated in
+    memory, with tool and shop loaded.
+    """
+    from apps.bookings.events import booking_status_events, publish
+
+    now = timezone.now()
+    changed = []
+    with transaction.atomic():
+        for edge in TRANSITIONS[target]:
+            rows = queryset.filter(status__in=edge.sources)
+            if edge.condition is not None:
+                rows = rows.filter(edge.condition)
+            # Locked in pk order until commit; a row changed concurrently is
+            # re-checked once its lock is released and drops out if it no
+            # longer matches, so every candidate is still in a source status
+            rows = rows.select_related('tool', 'shop').select_for_update(of=('self',)).order_by('pk')
+            candidates = {booking.pk: booking for booking in rows}
+            if not candidates:
+                continue
+
+            Booking.objects.filter(pk__in=candidates).update(
+                status=target, hold_expires_at=None, updated_at=now, **fields
+            )
+
+            if edge.inventory is not None:
+                units = Counter()
+                for booking in candidates.values():
+                    units[booking.tool_id] += booking.quantity
+                for tool_id, quantity in units.items():
+                    edge.inventory(tool_id, quantity)
+
+            events = []
+            for booking in candidates.values():
+                previous = booking.status
+                booking.status = target
+                booking.hold_expires_at = None
+                booking.updated_at = now
+                for name, value in fields.items():
+                    setattr(booking, name, value)
+                booking._loaded_status = target
+                events.extend(booking_status_events(booking, previous))
+                changed.append(booking)
+            publish(events)
+    return changed
+
+
+def mark_paid(booking, payment_id):
+    """
+    Activate a confirmed booking whose Razorpay payment succeeded and tell
+    both parties. Shared by verify_payment and the payment webhook, so
+    whichever arrives first activates it and the other is a no-op.
+    Returns True if this call activated the booking.
+    """
+    from apps.bookings.notifications import notify
+
+    with transaction.atomic():
+        if not transition(booking, 'active', payment_status='paid', razorpay_payment_id=payment_id):
+            return False
+        notify(
+            booking.renter,
+            type='payment',
+            title='Payment Successful',
+            message=f'Payment for {booking.tool.name} was successful. Your booking is active!',
+            related_object_id=str(booking.id)
+        )
+        notify(
+            booking.shop.owner,
+            type='payment',
+            title='Payment Received',
+            message=f'Payment received for booking {booking.id}',
+            related_object_id=str(booking.id)
+        )
+    return True
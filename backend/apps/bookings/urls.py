@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet, NotificationViewSet
+from .views import BookingViewSet, EventTicketView, NotificationViewSet, event_stream
 
 router = DefaultRouter()
 router.register(r'bookings', BookingViewSet, basename='booking')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    path('events/', event_stream, name='event-stream'),
+    path('events/ticket/', EventTicketView.as_view(), name='event-ticket'),
     path('', include(router.urls)),
 ]
@@ -1,27 +1,40 @@
+import asyncio
+import time
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from apps.bookings.models import Booking, Notification
+from core.middleware import track_queries
+from core.mixins import EagerLoadingMixin
+from apps.bookings.events import issue_ticket, redeem_ticket, stream, stream_once
+from apps.bookings.idempotency import idempotent
+from apps.bookings.notifications import mark_read, notify, notify_many
+from apps.bookings.transitions import mark_paid, transition, transition_many
 from apps.payments.services import create_razorpay_order, verify_payment_signature
 from .serializers import (
-    BookingSerializer, BookingCreateSerializer, NotificationSerializer
+    BookingSerializer, BookingCreateSerializer, BulkBookingActionSerializer,
+    NotificationSerializer
 )
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """ViewSet for Booking operations"""
     
-    queryset = Booking.objects.select_related(
-        'renter', 
-        'tool', 
-        'tool__category',
-        'shop', 
-        'shop__owner'
-    ).all()
+    # Joins/prefetches are declared by BookingSerializer.setup_eager_loading
+    queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
@@ -35,10 +48,10 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         # Providers see bookings for their shops
         if user.user_type == 'provider':
-            return self.queryset.filter(shop__owner=user)
+            return self.eager_load(self.queryset.filter(shop__owner=user))
         
         # Renters see their own bookings
-        return self.queryset.filter(renter=user)
+        return self.eager_load(self.queryset.filter(renter=user))
     
     def get_serializer_class(self):
         """Return appropriate serializer"""
@@ -46,6 +59,10 @@ class BookingViewSet(viewsets.ModelViewSet):
             return BookingCreateSerializer
         return BookingSerializer
     
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
 
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
@@ -65,16 +82,27 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        booking.status = 'confirmed'
-        booking.save(update_fields=['status'])
+        if booking.hold_expired:
+            return Response(
+                {'error': 'This booking request has expired'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Send notification to renter
-        Notification.objects.create(
-            user=booking.renter,
-            type='booking',
-            title='Booking Confirmed',
-            message=f'Your booking for {booking.tool.name} has been confirmed. Please complete payment to activate it.'
-        )
+        with transaction.atomic():
+            if not transition(booking, 'confirmed'):
+                return Response(
+                    {'error': 'Booking was changed by another request'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            
+            # Send notification to renter
+            notify(
+                booking.renter,
+                type='booking',
+                title='Booking Confirmed',
+                message=f'Your booking for {booking.tool.name} has been confirmed. Please complete payment to activate it.',
+                related_object_id=str(booking.id)
+            )
         
         serializer = self.get_serializer(booking)
         return Response(serializer.data)
@@ -97,23 +125,123 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Atomically restore quantity if booking was confirmed/active
-        if booking.status in ['confirmed', 'active']:
-            from django.db.models import F
-            from apps.tools.models import Tool
-            Tool.objects.filter(id=booking.tool_id).update(
-                quantity_available=F('quantity_available') + booking.quantity
+        # Restores units if it was active (apps.bookings.transitions)
+        if not transition(booking, 'cancelled'):
+            return Response(
+                {'error': 'Booking was changed by another request'},
+                status=status.HTTP_409_CONFLICT
             )
         
-        booking.status = 'cancelled'
-        booking.save(update_fields=['status'])
-        
         serializer = self.get_serializer(booking)
         return Response(serializer.data)
 
 
 
     @action(detail=True, methods=['post'])
+    def mark_returned(self, request, pk=None):
+        """Mark an active booking as returned, putting its units back on the shelf (shop owner only)"""
+        booking = self.get_object()
+        
+        if booking.shop.owner != request.user:
+            return Response(
+                {'error': 'Only shop owner can mark bookings as returned'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if booking.status != 'active':
+            return Response(
+                {'error': 'Only active bookings can be marked as returned'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            if not transition(booking, 'returned', return_time=timezone.now()):
+                return Response(
+                    {'error': 'Booking was changed by another request'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            notify(
+                booking.renter,
+                type='booking',
+                title='Rental Returned',
+                message=f'Your rental of {booking.tool.name} has been marked as returned. Thank you!',
+                related_object_id=str(booking.id)
+            )
+        
+        serializer = self.get_serializer(booking)
+        return Response(serializer.data)
+    
+    def _bulk_transition(self, request, target, title, message, **fields):
+        """
+        Apply a transition to many of the provider's bookings with set-based
+        updates (apps.bookings.transitions) and notify the renters in one
+        insert. Returns {"updated": n, "results": {id: outcome}} where the
+        outcome is the new status, "invalid_status" or "not_found".
+        """
+        serializer = BulkBookingActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        bookings = Booking.objects.filter(shop__owner=request.user, id__in=ids)
+        
+        with transaction.atomic():
+            # Outcomes come from this transaction: transition_many locks the
+            # rows it changes, so "updated" is exactly what was written
+            found = set(bookings.values_list('id', flat=True))
+            changed = transition_many(bookings, target, **fields)
+            notify_many([
+                Notification(
+                    user_id=booking.renter_id,
+                    type='booking',
+                    title=title,
+                    message=message.format(tool=booking.tool.name),
+                    related_object_id=str(booking.id)
+                )
+                for booking in changed
+            ])
+        
+        changed_ids = {booking.id for booking in changed}
+        return Response({
+            'updated': len(changed),
+            'results': {
+                str(booking_id): (
+                    target if booking_id in changed_ids
+                    else 'invalid_status' if booking_id in found
+                    else 'not_found'
+                )
+                for booking_id in ids
+            },
+        })
+    
+    @action(detail=False, methods=['post'])
+    def bulk_confirm(self, request):
+        """Confirm many pending bookings at once. Body: {"ids": [...]} (shop owner)"""
+        return self._bulk_transition(
+            request, 'confirmed',
+            title='Booking Confirmed',
+            message='Your booking for {tool} has been confirmed. Please complete payment to activate it.',
+        )
+    
+    @action(detail=False, methods=['post'])
+    def bulk_cancel(self, request):
+        """Cancel many bookings at once, restoring units of active ones. Body: {"ids": [...]} (shop owner)"""
+        return self._bulk_transition(
+            request, 'cancelled',
+            title='Booking Cancelled',
+            message='Your booking for {tool} has been cancelled by the shop.',
+        )
+    
+    @action(detail=False, methods=['post'])
+    def bulk_mark_returned(self, request):
+        """Mark many active bookings as returned. Body: {"ids": [...]} (shop owner)"""
+        return self._bulk_transition(
+            request, 'returned',
+            title='Rental Returned',
+            message='Your rental of {tool} has been marked as returned. Thank you!',
+            return_time=timezone.now(),
+        )
+    
+    @action(detail=True, methods=['post'])
+    @idempotent
     def create_payment(self, request, pk=None):
         """Create Razorpay order for booking"""
         booking = self.get_object()
@@ -155,6 +283,7 @@ class BookingViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def verify_payment(self, request, pk=None):
         """Verify Razorpay payment"""
         booking = self.get_object()
@@ -182,25 +311,14 @@ class BookingViewSet(viewsets.ModelViewSet):
             )
             
             if is_valid:
-                booking.payment_status = 'paid'
-                booking.razorpay_payment_id = razorpay_payment_id
-                booking.status = 'active'  # Automatically activate paid booking
-                booking.save(update_fields=['payment_status', 'razorpay_payment_id', 'status'])
-                
-                # Notify both parties
-                Notification.objects.create(
-                    user=booking.renter,
-                    type='payment',
-                    title='Payment Successful',
-                    message=f'Payment for {booking.tool.name} was successful. Your booking is active!'
-                )
-                
-                Notification.objects.create(
-                    user=booking.shop.owner,
-                    type='payment',
-                    title='Payment Received',
-                    message=f'Payment received for booking {booking.id}'
-                )
+                if not mark_paid(booking, razorpay_payment_id):
+                    # Already activated with this payment (e.g. by the webhook)
+                    booking.refresh_from_db(fields=['payment_status', 'razorpay_payment_id'])
+                    if booking.payment_status != 'paid' or booking.razorpay_payment_id != razorpay_payment_id:
+                        return Response(
+                            {'error': 'Booking cannot be activated in its current status'},
+                            status=status.HTTP_409_CONFLICT
+                        )
                 
                 return Response({'status': 'Payment verified successfully'})
             else:
@@ -231,8 +349,8 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     def mark_read(self, request, pk=None):
         """Mark notification as read"""
         notification = self.get_object()
-        notification.is_read = True
-        notification.save(update_fields=['is_read'])
+        if mark_read(request.user, [notification.id]):
+            notification.is_read = True
         
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
@@ -240,5 +358,81 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        self.get_queryset().update(is_read=True)
+        mark_read(request.user)
         return Response({'status': 'All notifications marked as read'})
+    
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Unread badge count, read from the user row loaded by authentication"""
+        return Response({'unread_count': request.user.unread_notifications})
+
+
+class EventTicketView(APIView):
+    """
+    Issue a short-lived, single-use ticket for opening the events stream
+    with EventSource, which cannot send the Authorization header
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        expires_at = request.auth.get('exp') if request.auth is not None else None
+        if expires_at is None:
+            expires_at = time.time() + jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        return Response({
+            'ticket': issue_ticket(request.user.pk, expires_at),
+            'expires_in': settings.EVENT_STREAM_TICKET_SECONDS,
+        })
+
+
+async def event_stream(request):
+    """
+    Server-sent events for the authenticated user: new notifications and
+    booking status changes (apps.bookings.events). Browsers authenticate
+    with ``?ticket=`` from EventTicketView; other clients may send their
+    access token in the Authorization header. Served continuously under
+    ASGI; under WSGI it sends what is pending and closes, and the client
+    reconnects after the advertised retry delay.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Method not allowed.'}, status=405)
+
+    ticket = request.GET.get('ticket')
+    header = request.META.get('HTTP_AUTHORIZATION')
+    if ticket:
+        redeemed = await sync_to_async(track_queries(request, redeem_ticket))(ticket)
+        if redeemed is None:
+            return JsonResponse({'detail': 'Stream ticket is invalid, expired or already used.'}, status=401)
+        user_id, expires = redeemed
+    elif header:
+        auth = JWTAuthentication()
+        raw_token = auth.get_raw_token(header.encode())
+        if raw_token is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        try:
+            token = auth.get_validated_token(raw_token)
+            user = await sync_to_async(track_queries(request, auth.get_user))(token)
+        except (InvalidToken, AuthenticationFailed) as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+            return JsonResponse(detail, status=401)
+        user_id, expires = user.pk, token['exp']
+    else:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+
+    if isinstance(request, ASGIRequest):
+        # End with the access token; the client reconnects with a new ticket
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + max(expires - time.time(), 0)
+        content = stream(user_id, last_id, expires_at, instrument=lambda func: track_queries(request, func))
+    else:
+        content = stream_once(user_id, last_id)
+
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
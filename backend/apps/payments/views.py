@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
 from apps.bookings.models import Booking
+from apps.bookings.transitions import mark_paid
 from apps.payments.services import _get_client
 import razorpay
 import json
@@ -47,13 +48,12 @@ class RazorpayWebhookView(APIView):
                 
                 # Find booking by order_id
                 try:
-                    booking = Booking.objects.get(razorpay_order_id=order_id)
+                    booking = Booking.objects.select_related('tool', 'shop__owner', 'renter').get(
+                        razorpay_order_id=order_id
+                    )
                     
-                    if booking.payment_status != 'paid':
-                        booking.payment_status = 'paid'
-                        booking.status = 'active'  # Promote to active, matching verify_payment flow
-                        booking.razorpay_payment_id = payment_id
-                        booking.save(update_fields=['payment_status', 'status', 'razorpay_payment_id'])
+                    # Conditional transition: a no-op if verify_payment got there first
+                    if mark_paid(booking, payment_id):
                         logger.info(f"Payment captured and booking {booking.id} activated via webhook")
                         
                 except Booking.DoesNotExist:
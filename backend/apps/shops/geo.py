@@ -0,0 +1,190 @@
+"""
+Geospatial query engine for shop locations.
+
+Two interchangeable backends expose the same ``nearby()`` API:
+
+* ``GridGeoBackend`` (SQLite / plain PostgreSQL): shops are bucketed into a
+  fixed grid of GRID_CELL_DEGREES-sized cells so a radius search narrows
+  candidates with an indexed ``geo_cell IN (...)`` lookup before the exact
+  Haversine distance is computed in the database.
+* ``PostGISGeoBackend``: a geography point built from lat/lng with
+  ``ST_DWithin`` and KNN ``<->`` ordering, served by a GiST expression
+  index on that same point (``POSTGIS_INDEX_SQL``).
+
+The active backend is chosen by ``settings.GEO_BACKEND``. The schema is the
+same for both: the expression index is created by migration
+``shops.0008_shop_location_point_index`` when the database has PostGIS.
+"""
+import math
+from django.conf import settings
+from django.db.models import BooleanField, F, FloatField, Func, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.0
+
+# ~11 km cells: a default 10 km search touches at most 9 cells
+GRID_CELL_DEGREES = 0.1
+GRID_COLUMNS = int(round(360 / GRID_CELL_DEGREES))
+
+# Above this many cells the IN list costs more than a plain bounding-box scan
+MAX_GRID_CELLS = 400
+
+
+def _lat_index(lat):
+    return int(math.floor((min(max(lat, -90.0), 90.0) + 90.0) / GRID_CELL_DEGREES))
+
+
+def _lng_index(lng):
+    return int(math.floor((lng + 180.0) / GRID_CELL_DEGREES)) % GRID_COLUMNS
+
+
+def grid_cell(lat, lng):
+    """Return the grid cell id containing (lat, lng), or None if unset."""
+    if lat is None or lng is None:
+        return None
+    return _lat_index(lat) * GRID_COLUMNS + _lng_index(lng)
+
+
+def bounding_box(lat, lng, radius_km):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing the search circle."""
+    lat_range = radius_km / KM_PER_DEGREE
+    lng_range = radius_km / (KM_PER_DEGREE * max(abs(math.cos(math.radians(lat))), 0.0001))
+    return lat - lat_range, lat + lat_range, lng - lng_range, lng + lng_range
+
+
+def grid_cells_for_radius(lat, lng, radius_km):
+    """
+    Return the list of grid cells covering the search circle's bounding box,
+    or None when the area is too large for a cell filter to help.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    if max_lng - min_lng >= 360:
+        return None
+
+    lat_indexes = range(_lat_index(min_lat), _lat_index(max_lat) + 1)
+    lng_span = int(math.floor((max_lng + 180.0) / GRID_CELL_DEGREES)) - \
+        int(math.floor((min_lng + 180.0) / GRID_CELL_DEGREES)) + 1
+    if len(lat_indexes) * lng_span > MAX_GRID_CELLS:
+        return None
+
+    first_lng = _lng_index(min_lng)
+    lng_indexes = [(first_lng + i) % GRID_COLUMNS for i in range(lng_span)]
+    return [
+        lat_idx * GRID_COLUMNS + lng_idx
+        for lat_idx in lat_indexes
+        for lng_idx in lng_indexes
+    ]
+
+
+def distance_expression(lat, lng, prefix=''):
+    """
+    Haversine distance in km from (lat, lng) to the shop location, as a
+    database expression. ``prefix`` is the lookup path to the shop
+    (e.g. ``'shop__'`` when querying tools).
+    """
+    shop_lat = Radians(F(f'{prefix}location_lat'))
+    shop_lng = Radians(F(f'{prefix}location_lng'))
+    origin_lat = Value(math.radians(lat), output_field=FloatField())
+    origin_lng = Value(math.radians(lng), output_field=FloatField())
+
+    a = (
+        Power(Sin((shop_lat - origin_lat) / 2), 2) +
+        Value(math.cos(math.radians(lat)), output_field=FloatField()) * Cos(shop_lat) *
+        Power(Sin((shop_lng - origin_lng) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM, output_field=FloatField()) * ASin(Sqrt(a))
+
+
+class GridGeoBackend:
+    """Grid-cell prefilter plus database-side Haversine distance"""
+
+    def nearby(self, queryset, lat, lng, radius_km, prefix=''):
+        """
+        Restrict ``queryset`` to shops within ``radius_km`` of (lat, lng),
+        annotate each row with ``distance`` (km) and order nearest first,
+        ties by pk so pages are stable. ``prefix`` is the lookup path to the
+        shop (e.g. ``'shop__'``).
+        """
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        queryset = queryset.filter(**{
+            f'{prefix}location_lat__gte': min_lat,
+            f'{prefix}location_lat__lte': max_lat,
+            f'{prefix}location_lng__gte': min_lng,
+            f'{prefix}location_lng__lte': max_lng,
+        })
+
+        cells = grid_cells_for_radius(lat, lng, radius_km)
+        if cells is not None:
+            queryset = queryset.filter(**{f'{prefix}geo_cell__in': cells})
+
+        return queryset.annotate(
+            distance=distance_expression(lat, lng, prefix)
+        ).filter(distance__lte=radius_km).order_by('distance', 'pk')
+
+
+POINT_TEMPLATE = 'ST_SetSRID(ST_MakePoint(%(expressions)s), 4326)::geography'
+
+POSTGIS_INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS shops_location_point_gist ON shops USING GIST "
+    "((ST_SetSRID(ST_MakePoint(location_lng, location_lat), 4326)::geography))",
+]
+
+POSTGIS_DROP_SQL = [
+    "DROP INDEX IF EXISTS shops_location_point_gist",
+]
+
+
+def location_point_expression(prefix=''):
+    """
+    Geography point of the shop location; matches the indexed expression
+    so PostGIS can use ``shops_location_point_gist``
+    """
+    return Func(F(f'{prefix}location_lng'), F(f'{prefix}location_lat'), template=POINT_TEMPLATE)
+
+
+class PostGISGeoBackend:
+    """ST_DWithin radius filter with KNN ordering on the GiST-indexed point"""
+
+    def nearby(self, queryset, lat, lng, radius_km, prefix=''):
+        point = location_point_expression(prefix)
+        origin = Func(
+            Value(lng, output_field=FloatField()),
+            Value(lat, output_field=FloatField()),
+            template=POINT_TEMPLATE,
+        )
+        within = Func(
+            point, origin, Value(radius_km * 1000.0, output_field=FloatField()),
+            function='ST_DWithin', output_field=BooleanField(),
+        )
+        distance_m = Func(point, origin, function='ST_Distance', output_field=FloatField())
+        # <-> on geography is index-assisted (KNN) and returns metres
+        knn_distance = Func(
+            point, origin, template='%(expressions)s', arg_joiner=' <-> ',
+            output_field=FloatField(),
+        )
+
+        return queryset.filter(within).annotate(
+            distance=distance_m / Value(1000.0, output_field=FloatField())
+        ).order_by(knn_distance, 'pk')
+
+
+GEO_BACKENDS = {
+    'grid': GridGeoBackend,
+    'postgis': PostGISGeoBackend,
+}
+
+_backend = None
+
+
+def get_geo_backend():
+    """Return the geo backend configured by settings.GEO_BACKEND"""
+    global _backend
+    if _backend is None:
+        _backend = GEO_BACKENDS[getattr(settings, 'GEO_BACKEND', 'grid')]()
+    return _backend
+
+
+def filter_nearby(queryset, lat, lng, radius_km, prefix=''):
+    """Shortcut for ``get_geo_backend().nearby(...)``"""
+    return get_geo_backend().nearby(queryset, lat, lng, radius_km, prefix=prefix)
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_geo_cells(apps, schema_editor):
+    from apps.shops.geo import grid_cell
+    Shop = apps.get_model('shops', 'Shop')
+    shops = list(Shop.objects.only('id', 'location_lat', 'location_lng'))
+    for shop in shops:
+        shop.geo_cell = grid_cell(shop.location_lat, shop.location_lng)
+    Shop.objects.bulk_update(shops, ['geo_cell'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shop',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, editable=False, help_text='Spatial grid cell derived from lat/lng (see apps.shops.geo)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='shop',
+            index=models.Index(fields=['geo_cell'], name='shops_geo_cel_76e569_idx'),
+        ),
+        migrations.RunPython(backfill_geo_cells, migrations.RunPython.noop),
+    ]
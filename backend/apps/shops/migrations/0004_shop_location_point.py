@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:20
+#
+# Originally added a generated location_point column on PostGIS only, which
+# made the migrated schema depend on settings.GEO_BACKEND. Superseded by
+# 0008_shop_location_point_index, which drops that column where it exists
+# and indexes the location expression instead; kept so the graph is intact.
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0003_shop_geo_cell'),
+    ]
+
+    operations = []
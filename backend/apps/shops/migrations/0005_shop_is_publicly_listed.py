@@ -0,0 +1,67 @@
+# Generated by Django 5.0.1 on 2026-10-18 02:58
+
+from django.conf import settings
+from django.db import migrations, models
+from datetime import timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def backfill_listing(apps, schema_editor):
+    """
+    Initialise the listing state from superuser flags and active subscriptions.
+    The subscriptions app has no migrations, so its table is read directly
+    (and skipped if it does not exist yet).
+    """
+    Shop = apps.get_model('shops', 'Shop')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    connection = schema_editor.connection
+
+    Shop.objects.filter(
+        owner_id__in=User.objects.filter(is_superuser=True).values('id')
+    ).update(is_publicly_listed=True, subscription_expires_at=None)
+
+    if 'subscriptions_subscription' not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT user_id, MAX(end_date) FROM subscriptions_subscription "
+            "WHERE status = 'active' AND end_date > %s GROUP BY user_id",
+            [timezone.now()]
+        )
+        rows = cursor.fetchall()
+    superuser_ids = set(User.objects.filter(is_superuser=True).values_list('id', flat=True))
+    for user_id, end_date in rows:
+        owner_id = User._meta.pk.to_python(user_id)
+        if owner_id in superuser_ids:
+            continue
+        # SQLite hands back raw UTC strings
+        if isinstance(end_date, str):
+            end_date = parse_datetime(end_date)
+        if timezone.is_naive(end_date):
+            end_date = timezone.make_aware(end_date, dt_timezone.utc)
+        Shop.objects.filter(owner_id=owner_id).update(
+            is_publicly_listed=True,
+            subscription_expires_at=end_date,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0004_shop_location_point'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shop',
+            name='is_publicly_listed',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='shop',
+            index=models.Index(fields=['is_publicly_listed', 'subscription_expires_at'], name='shops_is_publ_cab6fc_idx'),
+        ),
+        migrations.RunPython(backfill_listing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:40
+#
+# apps.subscriptions has no migrations package (its table is created with
+# `migrate --run-syncdb`), so the (status, end_date) index declared on
+# Subscription.Meta is only created for fresh tables. This adds it to
+# existing databases for the expire_subscriptions sweeper.
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if 'subscriptions_subscription' not in connection.introspection.table_names():
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS subscriptions_status_end_idx "
+        "ON subscriptions_subscription (status, end_date)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0005_shop_is_publicly_listed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0006_subscription_status_end_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shop',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
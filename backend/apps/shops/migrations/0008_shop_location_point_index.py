@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:30
+#
+# GiST expression index for the PostGIS geo backend (see apps.shops.geo).
+# The model state is the same on every database; the index is only created
+# when the connection has PostGIS, and the location_point column added by an
+# earlier version of 0004 is dropped.
+
+from django.db import migrations
+
+from apps.shops.geo import POSTGIS_DROP_SQL, POSTGIS_INDEX_SQL
+
+
+def has_postgis(schema_editor):
+    return getattr(schema_editor.connection.ops, 'postgis', False)
+
+
+def create_location_index(apps, schema_editor):
+    if not has_postgis(schema_editor):
+        return
+    for sql in POSTGIS_DROP_SQL + ['ALTER TABLE shops DROP COLUMN IF EXISTS location_point'] + POSTGIS_INDEX_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_location_index(apps, schema_editor):
+    if not has_postgis(schema_editor):
+        return
+    for sql in POSTGIS_DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0007_shop_rating_sum'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_location_index, drop_location_index),
+    ]
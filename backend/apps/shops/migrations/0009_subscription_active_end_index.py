@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-18 05:10
+#
+# apps.subscriptions has no migrations package, so its Meta indexes are only
+# created for fresh tables. This replaces the (status, end_date) index added
+# by 0006 with the partial index the expire_subscriptions sweeper reads:
+# end_date of active subscriptions.
+
+from django.db import migrations
+
+
+def replace_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if 'subscriptions_subscription' not in connection.introspection.table_names():
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS subscriptions_status_end_idx")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS subscriptions_active_end_idx "
+        "ON subscriptions_subscription (end_date) WHERE status = 'active'"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0008_shop_location_point_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(replace_index, migrations.RunPython.noop),
+    ]
@@ -31,6 +31,12 @@ class Shop(models.Model):
     # Geolocation (stored as lat/lng for SQLite, PointField for PostGIS)
     location_lat = models.FloatField(help_text="Shop latitude")
     location_lng = models.FloatField(help_text="Shop longitude")
+    geo_cell = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Spatial grid cell derived from lat/lng (see apps.shops.geo)"
+    )
     
     # Contact information
     phone = models.CharField(max_length=15)
@@ -51,6 +57,7 @@ class Shop(models.Model):
         validators=[MinValueValidator(0.00)]
     )
     total_ratings = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0, editable=False)
     
     # Subscription
     subscription_tier = models.CharField(
@@ -60,6 +67,9 @@ class Shop(models.Model):
     )
     subscription_expires_at = models.DateTimeField(null=True, blank=True)
     
+    # Public listing (denormalized from owner/subscriptions, see apps.shops.visibility)
+    is_publicly_listed = models.BooleanField(default=False, editable=False)
+    
     # Status
     is_active = models.BooleanField(default=True)
     
@@ -80,12 +90,26 @@ class Shop(models.Model):
             models.Index(fields=['owner']),
             models.Index(fields=['subscription_tier']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['geo_cell']),
+            models.Index(fields=['is_publicly_listed', 'subscription_expires_at']),
         ]
-        # GiST index for location will be added in migration
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        """Keep the spatial grid cell in sync and set the initial listing state"""
+        from apps.shops.geo import grid_cell
+        self.geo_cell = grid_cell(self.location_lat, self.location_lng)
+        if self._state.adding and self.owner_id:
+            from apps.shops.visibility import listing_state
+            self.is_publicly_listed, self.subscription_expires_at = \
+                listing_state([self.owner_id])[self.owner_id]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'location_lat', 'location_lng'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geo_cell'}
+        super().save(*args, **kwargs)
+    
     @property
     def has_active_subscription(self):
         """Check if shop has active subscription"""
@@ -95,16 +119,12 @@ class Shop(models.Model):
         return self.subscription_expires_at > timezone.now()
     
     def update_rating(self):
-        """Recalculate average rating from reviews"""
+        """Recalculate rating aggregates from reviews (used to repair drift)"""
         from apps.tools.models import Review
-        reviews = Review.objects.filter(shop=self)
-        if reviews.exists():
-            self.total_ratings = reviews.count()
-            self.rating_average = reviews.aggregate(
-                avg=models.Avg('rating')
-            )['avg'] or 0.00
-        else:
-            # Reset to zero when last review is deleted
-            self.total_ratings = 0
-            self.rating_average = 0.00
-        self.save(update_fields=['rating_average', 'total_ratings'])
+        totals = Review.objects.filter(shop=self).aggregate(
+            count=models.Count('id'), total=models.Sum('rating')
+        )
+        self.total_ratings = totals['count']
+        self.rating_sum = totals['total'] or 0
+        self.rating_average = round(self.rating_sum / self.total_ratings, 2) if self.total_ratings else 0.00
+        self.save(update_fields=['rating_average', 'total_ratings', 'rating_sum'])
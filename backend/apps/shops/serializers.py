@@ -23,10 +23,17 @@ class ShopSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
     
+    @classmethod
+    def setup_eager_loading(cls, queryset, prefix=''):
+        """Join the owner and set up its nested has_shop lookup"""
+        queryset = queryset.select_related(f'{prefix}owner')
+        return UserSerializer.setup_eager_loading(queryset, prefix=f'{prefix}owner__')
+    
     def get_distance(self, obj):
         """Calculate distance from request location (if provided)"""
-        # This will be calculated in the view if lat/lng are in request
-        return getattr(obj, 'distance', None)
+        # Annotated in km by the geo backend on nearby queries
+        distance = getattr(obj, 'distance', None)
+        return round(distance, 2) if distance is not None else None
 
 
 class ShopCreateSerializer(serializers.ModelSerializer):
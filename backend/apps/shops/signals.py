@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from apps.tools import suggest
+from core.cache import bump
+
+# Sent after the public listing state of shops changes.
+# Arguments: owner_ids - ids of the users whose shops were refreshed
+listing_visibility_changed = Signal()
+
+
+@receiver([post_save, post_delete], sender='shops.Shop')
+def invalidate_shop_caches(sender, **kwargs):
+    # Tool payloads embed their shop
+    bump('shops', 'tools')
+    suggest.invalidate()
+
+
+@receiver(listing_visibility_changed)
+def invalidate_listing_caches(sender, **kwargs):
+    bump('shops', 'tools')
+    suggest.invalidate()
@@ -6,14 +6,20 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q
 from apps.shops.models import Shop
+from apps.shops.geo import filter_nearby
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.mixins import EagerLoadingMixin
 from .serializers import ShopSerializer, ShopCreateSerializer, ShopDetailSerializer
-import math
 
 
-class ShopViewSet(viewsets.ModelViewSet):
+class ShopViewSet(ConditionalGetMixin, CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     """ViewSet for Shop CRUD operations"""
     
     queryset = Shop.objects.select_related('owner').filter(is_active=True)
+    # Shop detail counts tools and reviews
+    cache_namespaces = ('shops', 'tools', 'reviews')
+    cache_shared = True
     serializer_class = ShopSerializer
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['name', 'description', 'address']
@@ -63,25 +69,16 @@ class ShopViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Simple distance calculation (Haversine formula would be better)
-        # For now, filtering by bounding box
-        lat_range = radius / 111.0
-        lng_range = radius / (111.0 * max(abs(math.cos(math.radians(lat))), 0.0001))
-
-        
-        shops = self.queryset.filter(
-            location_lat__gte=lat - lat_range,
-            location_lat__lte=lat + lat_range,
-            location_lng__gte=lng - lng_range,
-            location_lng__lte=lng + lng_range
-        )
+        # Radius filter and nearest-first ordering run in the database via the
+        # configured geo backend (PostGIS or grid-cell index)
+        shops = self.eager_load(filter_nearby(self.queryset, lat, lng, radius))
         
         serializer = self.get_serializer(shops, many=True)
-        return Response(serializer.data)
+        return Response(self.serialized_data(serializer))
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_shops(self, request):
         """Get current user's shops"""
-        shops = Shop.objects.filter(owner=request.user)
+        shops = self.eager_load(Shop.objects.filter(owner=request.user))
         serializer = self.get_serializer(shops, many=True)
-        return Response(serializer.data)
+        return Response(self.serialized_data(serializer))
@@ -0,0 +1,80 @@
+"""
+Materialized public-listing state for shops.
+
+A shop's tools are publicly visible when its owner is a superuser or holds an
+active subscription. Rather than evaluating that with a Subscription subquery
+on every tool request, it is denormalized onto Shop:
+
+* ``is_publicly_listed`` - owner is a superuser or has an active subscription
+* ``subscription_expires_at`` - end of the owner's active subscription
+  (left empty for superuser-owned shops, which never lapse)
+
+The state is refreshed whenever a subscription is written, and pushed when
+subscriptions lapse by the ``expire_subscriptions`` management command;
+``publicly_listed_q()`` also checks ``subscription_expires_at`` so a late
+sweep never keeps a lapsed shop listed.
+"""
+from collections import defaultdict
+from django.contrib.auth import get_user_model
+from django.db.models import Max, Q
+from django.db.models.functions import Now
+from django.utils import timezone
+from apps.shops.models import Shop
+from apps.shops.signals import listing_visibility_changed
+
+
+def listing_state(user_ids):
+    """Return {user_id: (is_publicly_listed, subscription_expires_at)}"""
+    from apps.subscriptions.models import Subscription
+
+    user_ids = list(user_ids)
+    superusers = set(get_user_model().objects.filter(
+        id__in=user_ids, is_superuser=True
+    ).values_list('id', flat=True))
+    expiries = dict(Subscription.objects.filter(
+        user_id__in=user_ids,
+        status='active',
+        end_date__gt=timezone.now()
+    ).values('user_id').annotate(end=Max('end_date')).values_list('user_id', 'end'))
+
+    state = {}
+    for user_id in user_ids:
+        if user_id in superusers:
+            state[user_id] = (True, None)
+        elif user_id in expiries:
+            state[user_id] = (True, expiries[user_id])
+        else:
+            state[user_id] = (False, None)
+    return state
+
+
+def refresh_listing(user_ids):
+    """
+    Recompute the listing state of every shop owned by ``user_ids`` (one
+    UPDATE per distinct state) and notify listing caches.
+    """
+    user_ids = list(user_ids)
+    by_state = defaultdict(list)
+    for user_id, state in listing_state(user_ids).items():
+        by_state[state].append(user_id)
+
+    for (listed, expires_at), owner_ids in by_state.items():
+        Shop.objects.filter(owner_id__in=owner_ids).update(
+            is_publicly_listed=listed,
+            subscription_expires_at=expires_at,
+        )
+
+    if by_state:
+        listing_visibility_changed.send(sender=Shop, owner_ids=user_ids)
+
+
+def publicly_listed_q(prefix=''):
+    """
+    Filter for shops whose listing is live. Lapsed subscriptions are
+    unlisted by the expire_subscriptions sweeper; the expiry check hides
+    them in the meantime, should the sweeper run late.
+    """
+    return Q(**{f'{prefix}is_publicly_listed': True}) & (
+        Q(**{f'{prefix}subscription_expires_at__isnull': True})
+        | Q(**{f'{prefix}subscription_expires_at__gt': Now()})
+    )
@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.shops.visibility import refresh_listing
+from apps.subscriptions.models import Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark lapsed active subscriptions as expired in batches and push the "
+        "resulting shop listing changes. Run from cron, or with --loop as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep running, sweeping every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60)
+
+    def handle(self, *args, **options):
+        while True:
+            expired = self.sweep(options['batch_size'])
+            if expired:
+                self.stdout.write(f"Expired {expired} subscription(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size):
+        """Expire everything that has lapsed, one range of the active end_date index per batch"""
+        total = 0
+        while True:
+            now = timezone.now()
+            batch = list(Subscription.objects.filter(
+                status='active',
+                end_date__lte=now
+            ).order_by('end_date').values_list('id', 'user_id')[:batch_size])
+            if not batch:
+                return total
+
+            Subscription.objects.filter(
+                id__in=[sub_id for sub_id, _ in batch],
+                status='active'
+            ).update(status='expired', updated_at=now)
+            refresh_listing({user_id for _, user_id in batch})
+            total += len(batch)
@@ -24,9 +24,25 @@ class Subscription(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # expire_subscriptions sweeper: active rows by end_date
+            models.Index(
+                fields=['end_date'],
+                condition=models.Q(status='active'),
+                name='subscriptions_active_end_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.status}"
 
+    def save(self, *args, **kwargs):
+        """Refresh the owner's shop listing state after any subscription change"""
+        super().save(*args, **kwargs)
+        from apps.shops.visibility import refresh_listing
+        refresh_listing([self.user_id])
+
     @property
     def is_active(self):
         return self.status == 'active' and self.end_date and self.end_date > timezone.now()
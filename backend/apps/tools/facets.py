@@ -0,0 +1,69 @@
+"""
+Faceted counts for the tool list (``?facets=1``).
+
+All facets come from one GROUP BY over (category, condition, brand, price
+band) of the already filtered queryset; the per-facet totals are rolled up
+in Python from those combinations.
+"""
+from collections import Counter
+from django.db.models import Case, CharField, Count, Value, When
+from apps.tools.models import Tool
+
+# Price-per-day bands (lower bound inclusive, upper bound exclusive)
+PRICE_BANDS = [
+    ('0-100', 0, 100),
+    ('100-500', 100, 500),
+    ('500-1000', 500, 1000),
+    ('1000+', 1000, None),
+]
+
+
+def price_band_expression():
+    whens = []
+    for label, low, high in PRICE_BANDS:
+        lookup = {'price_per_day__gte': low}
+        if high is not None:
+            lookup['price_per_day__lt'] = high
+        whens.append(When(then=Value(label), **lookup))
+    return Case(*whens, default=Value(''), output_field=CharField())
+
+
+def tool_facets(queryset):
+    """Return grouped counts for category, condition, brand and price band"""
+    rows = queryset.order_by().values(
+        'category_id', 'category__name', 'condition', 'brand',
+        price_band=price_band_expression(),
+    ).annotate(count=Count('id'))
+
+    categories, category_names = Counter(), {}
+    conditions, brands, bands = Counter(), Counter(), Counter()
+    for row in rows:
+        count = row['count']
+        if row['category_id'] is not None:
+            categories[row['category_id']] += count
+            category_names[row['category_id']] = row['category__name']
+        conditions[row['condition']] += count
+        if row['brand']:
+            brands[row['brand']] += count
+        if row['price_band']:
+            bands[row['price_band']] += count
+
+    condition_labels = dict(Tool.CONDITION_CHOICES)
+    return {
+        'category': [
+            {'value': value, 'label': category_names[value], 'count': count}
+            for value, count in categories.most_common()
+        ],
+        'condition': [
+            {'value': value, 'label': condition_labels.get(value, value), 'count': count}
+            for value, count in conditions.most_common()
+        ],
+        'brand': [
+            {'value': value, 'label': value, 'count': count}
+            for value, count in brands.most_common()
+        ],
+        'price_band': [
+            {'value': label, 'label': label, 'count': bands[label]}
+            for label, _, _ in PRICE_BANDS if bands[label]
+        ],
+    }
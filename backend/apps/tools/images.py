@@ -0,0 +1,322 @@
+"""
+Off-request, content-addressed image pipeline for tool photos.
+
+Uploads are only staged to a local temporary file on the request thread,
+hashing the chunks (sha256) as they are written. The hash names the stored
+variants (``images/ab/<sha256>_<variant>.webp``) and keys an ``ImageBlob``
+row, so identical photos are processed and stored once: a re-upload of a
+known image is ready immediately and just takes another reference.
+
+New images are handed to a small thread pool that decodes them with Pillow,
+writes thumb/medium/full WebP variants to ``default_storage`` (Cloudinary
+when configured) and swaps the tool's placeholder entry for the finished one.
+
+``Tool.images`` holds one dict per image::
+
+    {"id": "...", "status": "processing", "queued_at": "<ISO 8601>"}
+    {"id": "...", "status": "ready", "sha256": "...", "width": 1600,
+     "height": 1200, "thumb": "<url>", "medium": "<url>", "full": "<url>"}
+    {"id": "...", "status": "failed", "error": "..."}
+
+Plain URL strings from before the pipeline remain valid entries.
+
+Jobs live in the worker process, so a restart or crash loses them;
+``gc_images`` marks placeholders queued more than
+IMAGE_PROCESSING_TIMEOUT_MINUTES ago as failed (``fail_stalled``).
+
+Each ready entry holds one reference on its blob. References are released
+when a tool is deleted or its images are replaced; a blob whose count drops
+to zero is deleted with its files. ``manage.py gc_images`` repairs counts
+and removes orphaned files.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import OperationalError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each stored variant
+IMAGE_VARIANTS = (
+    ('thumb', 200),
+    ('medium', 800),
+    ('full', 1600),
+)
+WEBP_QUALITY = 82
+
+# Storage directory for content-addressed variants
+BLOB_DIR = 'images'
+
+# Attempts at recording a result on the tool (SQLite reports concurrent
+# writers as "database is locked")
+REPLACE_ATTEMPTS = 5
+REPLACE_RETRY_SECONDS = 0.2
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2),
+    thread_name_prefix='tool-images',
+)
+
+# Jobs for the same tool update its images one at a time in this process
+_tool_locks = [threading.Lock() for _ in range(64)]
+
+
+def _tool_lock(tool_id):
+    return _tool_locks[hash(str(tool_id)) % len(_tool_locks)]
+
+
+def _log_failure(future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error('Image job failed', exc_info=exc)
+
+
+def _submit(*args):
+    _executor.submit(process_image, *args).add_done_callback(_log_failure)
+
+
+def blob_name(digest, variant):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}_{variant}.webp'
+
+
+def stage_upload(upload):
+    """
+    Copy an uploaded file to a local temp file chunk by chunk, hashing as
+    it goes. Returns (path, sha256 hex digest, size).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    suffix = os.path.splitext(upload.name)[1]
+    with tempfile.NamedTemporaryFile(prefix='toolsy-upload-', suffix=suffix, delete=False) as staged:
+        for chunk in upload.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+            staged.write(chunk)
+    return staged.name, digest.hexdigest(), size
+
+
+def acquire(digest):
+    """Take a reference on a blob; returns False if the blob does not exist"""
+    from apps.tools.models import ImageBlob
+    return ImageBlob.objects.filter(sha256=digest).update(ref_count=F('ref_count') + 1) > 0
+
+
+def _discard(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def queue_uploads(tool_id, uploads):
+    """
+    Stage ``uploads`` and return their Tool.images entries: ready entries
+    for images already stored, placeholders for the rest, whose processing
+    is scheduled once the current transaction commits.
+    """
+    from apps.tools.models import ImageBlob
+
+    entries = []
+    for upload in uploads:
+        image_id = uuid.uuid4().hex
+        staged_path, digest, size = stage_upload(upload)
+
+        blob = ImageBlob.objects.filter(sha256=digest).first()
+        if blob is not None and acquire(digest):
+            _discard(staged_path)
+            entries.append(blob.entry(image_id))
+            continue
+
+        entries.append({'id': image_id, 'status': 'processing', 'queued_at': timezone.now().isoformat()})
+        transaction.on_commit(
+            lambda image_id=image_id, staged_path=staged_path, digest=digest, size=size:
+                _submit(tool_id, image_id, staged_path, digest, size)
+        )
+    return entries
+
+
+def release_images(entries):
+    """Drop the references held by Tool.images ``entries`` after commit"""
+    digests = [
+        entry['sha256'] for entry in entries
+        if isinstance(entry, dict) and entry.get('sha256')
+    ]
+    if digests:
+        transaction.on_commit(lambda: _release(digests))
+
+
+def _release(digests):
+    from apps.tools.models import ImageBlob
+
+    for digest in digests:
+        ImageBlob.objects.filter(sha256=digest, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        blob = ImageBlob.objects.filter(sha256=digest, ref_count=0).first()
+        # Conditional delete: a concurrent acquire() keeps the blob alive
+        if blob is not None and ImageBlob.objects.filter(sha256=digest, ref_count=0).delete()[0]:
+            delete_blob_files(blob)
+
+
+def delete_blob_files(blob):
+    for stored in blob.variants.values():
+        try:
+            default_storage.delete(stored['name'])
+        except Exception:
+            logger.exception('Could not delete image %s', stored['name'])
+
+
+def render_variants(source):
+    """Yield (variant, width, height, webp bytes) for an opened Pillow image"""
+    from PIL import ImageOps
+
+    image = ImageOps.exif_transpose(source)
+    image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    for variant, edge in IMAGE_VARIANTS:
+        resized = image.copy()
+        resized.thumbnail((edge, edge))
+        buffer = io.BytesIO()
+        resized.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+        yield variant, resized.width, resized.height, buffer.getvalue()
+
+
+def store_blob(staged_path, digest, size):
+    """Render and store the variants of a staged image; returns its ImageBlob"""
+    from PIL import Image
+    from apps.tools.models import ImageBlob
+
+    blob = ImageBlob.objects.filter(sha256=digest).first()
+    if blob is not None:
+        return blob
+
+    variants = {}
+    width = height = 0
+    with Image.open(staged_path) as source:
+        for variant, width, height, data in render_variants(source):
+            name = blob_name(digest, variant)
+            # Same content, same name: another worker may have written it
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(data))
+            variants[variant] = {'name': name, 'url': default_storage.url(name)}
+
+    blob, _ = ImageBlob.objects.get_or_create(sha256=digest, defaults={
+        'variants': variants, 'width': width, 'height': height, 'size': size,
+    })
+    return blob
+
+
+def process_image(tool_id, image_id, staged_path, digest, size):
+    """
+    Worker job: store the image and record the result on the tool. Any
+    error, including one recording the result, leaves the entry 'failed'
+    rather than 'processing'.
+    """
+    close_old_connections()
+    try:
+        try:
+            blob = store_blob(staged_path, digest, size)
+            entry = blob.entry(image_id)
+        finally:
+            _discard(staged_path)
+        _record(tool_id, entry)
+    except Exception as exc:
+        logger.exception('Image %s for tool %s failed', image_id, tool_id)
+        _record(tool_id, {'id': image_id, 'status': 'failed', 'error': str(exc)[:200]})
+    finally:
+        close_old_connections()
+
+
+def _record(tool_id, entry):
+    """_replace_entry(), one job per tool at a time, retrying lock timeouts"""
+    with _tool_lock(tool_id):
+        for attempt in range(1, REPLACE_ATTEMPTS + 1):
+            try:
+                return _replace_entry(tool_id, entry)
+            except OperationalError:
+                if attempt == REPLACE_ATTEMPTS:
+                    raise
+                close_old_connections()
+                time.sleep(REPLACE_RETRY_SECONDS * attempt)
+
+
+def _swap(images, entry):
+    return [
+        entry if isinstance(image, dict) and image.get('id') == entry['id'] else image
+        for image in images
+    ]
+
+
+def _replace_entry(tool_id, entry):
+    from apps.tools.models import Tool
+
+    with transaction.atomic():
+        tool = Tool.objects.select_for_update().filter(id=tool_id).first()
+        if tool is None:
+            return
+        # The placeholder is gone if the tool's images were replaced meanwhile;
+        # an unreferenced blob is left for gc_images
+        if _swap(tool.images, entry) == tool.images:
+            return
+        if entry.get('sha256') and not acquire(entry['sha256']):
+            entry = {'id': entry['id'], 'status': 'failed', 'error': 'Image was removed during processing'}
+        tool.images = _swap(tool.images, entry)
+        tool.save(update_fields=['images', 'updated_at'])
+
+
+STALLED_ERROR = 'Processing was interrupted; upload the image again'
+
+
+def _stalled(image, cutoff, tool_updated_at):
+    if not isinstance(image, dict) or image.get('status') != 'processing':
+        return False
+    queued_at = parse_datetime(image.get('queued_at') or '')
+    # Placeholders from before queued_at was recorded: the tool's last write
+    return (queued_at or tool_updated_at) < cutoff
+
+
+def fail_stalled(older_than, dry_run=False):
+    """
+    Mark 'processing' entries queued before ``older_than`` as failed: their
+    job was lost with the worker that ran it. Returns the number marked
+    (found, with ``dry_run``).
+    """
+    from apps.tools.models import Tool
+
+    marked = 0
+    rows = Tool.objects.values_list('id', 'images', 'updated_at')
+    for tool_id, images, updated_at in rows.iterator(chunk_size=1000):
+        image_ids = [image['id'] for image in images or [] if _stalled(image, older_than, updated_at)]
+        if image_ids:
+            marked += len(image_ids) if dry_run else _fail_entries(tool_id, image_ids)
+    return marked
+
+
+def _fail_entries(tool_id, image_ids):
+    """Fail the entries still 'processing'; a job finishing meanwhile wins"""
+    from apps.tools.models import Tool
+
+    with transaction.atomic():
+        tool = Tool.objects.select_for_update().filter(id=tool_id).first()
+        if tool is None:
+            return 0
+        marked = 0
+        images = []
+        for image in tool.images:
+            if isinstance(image, dict) and image.get('id') in image_ids and image.get('status') == 'processing':
+                image = {'id': image['id'], 'status': 'failed', 'error': STALLED_ERROR}
+                marked += 1
+            images.append(image)
+        if marked:
+            tool.images = images
+            tool.save(update_fields=['images', 'updated_at'])
+    return marked
@@ -0,0 +1,105 @@
+import os
+from collections import Counter
+from datetime import timedelta
+from urllib.parse import unquote
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.tools.images import BLOB_DIR, delete_blob_files, fail_stalled
+from apps.tools.models import ImageBlob, Tool
+
+# Directories under MEDIA_ROOT holding tool images (legacy uploads and blobs)
+IMAGE_DIRS = ('tools', BLOB_DIR)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fail image uploads whose processing was lost, recount image blob "
+        "references from Tool.images, delete unreferenced blobs and remove "
+        "orphaned image files under MEDIA_ROOT"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report without deleting')
+        parser.add_argument(
+            '--grace-hours', type=int, default=24,
+            help='Leave anything newer than this alone (uploads still processing)'
+        )
+        parser.add_argument(
+            '--stalled-minutes', type=int, default=settings.IMAGE_PROCESSING_TIMEOUT_MINUTES,
+            help='Mark images still processing after this long as failed (their job was lost)'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+
+        stalled_cutoff = timezone.now() - timedelta(minutes=options['stalled_minutes'])
+        stalled = fail_stalled(stalled_cutoff, dry_run=dry_run)
+        self.stdout.write(f"Stalled images marked failed: {stalled}")
+
+        refs, legacy_names = self.scan_tools()
+        self.recount(refs, dry_run)
+
+        unused = ImageBlob.objects.filter(ref_count=0, created_at__lt=cutoff)
+        blob_count = 0
+        for blob in unused.iterator():
+            blob_count += 1
+            if not dry_run and ImageBlob.objects.filter(sha256=blob.sha256, ref_count=0).delete()[0]:
+                delete_blob_files(blob)
+        self.stdout.write(f"Unreferenced blobs removed: {blob_count}")
+
+        orphans = self.orphaned_files(legacy_names, cutoff)
+        for path in orphans:
+            if not dry_run:
+                os.remove(path)
+        self.stdout.write(f"Orphaned files removed: {len(orphans)}")
+
+    def scan_tools(self):
+        """Blob references and legacy storage names used by Tool.images"""
+        refs = Counter()
+        legacy_names = set()
+        for images in Tool.objects.values_list('images', flat=True).iterator(chunk_size=1000):
+            for image in images or []:
+                if isinstance(image, dict):
+                    if image.get('sha256'):
+                        refs[image['sha256']] += 1
+                    urls = [image.get(variant) for variant in ('thumb', 'medium', 'full')]
+                else:
+                    urls = [image]
+                for url in urls:
+                    if isinstance(url, str) and url.startswith(settings.MEDIA_URL):
+                        # URLs are percent-encoded; names on disk are not
+                        legacy_names.add(unquote(url[len(settings.MEDIA_URL):]))
+        return refs, legacy_names
+
+    def recount(self, refs, dry_run):
+        drifted = []
+        for blob in ImageBlob.objects.only('sha256', 'ref_count').iterator(chunk_size=1000):
+            if blob.ref_count != refs.get(blob.sha256, 0):
+                blob.ref_count = refs.get(blob.sha256, 0)
+                drifted.append(blob)
+        if not dry_run:
+            ImageBlob.objects.bulk_update(drifted, ['ref_count'], batch_size=500)
+        self.stdout.write(f"Reference counts corrected: {len(drifted)}")
+
+    def orphaned_files(self, legacy_names, cutoff):
+        """Files under the image directories that nothing references"""
+        media_root = str(settings.MEDIA_ROOT)
+        if not os.path.isdir(media_root):
+            return []
+
+        known = set(legacy_names)
+        for variants in ImageBlob.objects.values_list('variants', flat=True).iterator(chunk_size=1000):
+            known.update(stored['name'] for stored in variants.values())
+
+        orphans = []
+        cutoff_ts = cutoff.timestamp()
+        for directory in IMAGE_DIRS:
+            for root, _, files in os.walk(os.path.join(media_root, directory)):
+                for filename in files:
+                    path = os.path.join(root, filename)
+                    name = os.path.relpath(path, media_root).replace(os.sep, '/')
+                    if name not in known and os.path.getmtime(path) < cutoff_ts:
+                        orphans.append(path)
+        return orphans
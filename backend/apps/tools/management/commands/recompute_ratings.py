@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.shops.models import Shop
+from apps.tools.models import Tool
+from apps.tools.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute shop and tool rating aggregates from reviews to fix drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model, review_field in ((Shop, 'shop'), (Tool, 'tool')):
+            fixed = recompute_ratings(model, review_field, batch_size=options['batch_size'])
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {fixed} row(s) corrected")
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:03
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def backfill_ratings(apps, schema_editor):
+    Review = apps.get_model('tools', 'Review')
+    for model, field in ((apps.get_model('shops', 'Shop'), 'shop'), (apps.get_model('tools', 'Tool'), 'tool')):
+        totals = {
+            row[field]: (row['count'], row['total'])
+            for row in Review.objects.filter(**{f'{field}__isnull': False})
+            .values(field).annotate(count=models.Count('id'), total=models.Sum('rating'))
+        }
+        rows = list(model.objects.filter(id__in=totals).only('id'))
+        for obj in rows:
+            count, total = totals[obj.id]
+            obj.total_ratings, obj.rating_sum = count, total
+            obj.rating_average = round(total / count, 2)
+        model.objects.bulk_update(rows, ['total_ratings', 'rating_sum', 'rating_average'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0003_seed_tool_categories'),
+        ('shops', '0007_shop_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='rating_average',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=3, validators=[django.core.validators.MinValueValidator(0.0)]),
+        ),
+        migrations.AddField(
+            model_name='tool',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tool',
+            name='total_ratings',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
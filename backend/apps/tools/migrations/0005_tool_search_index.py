@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:30
+#
+# Full-text index for tool search (see apps.tools.search): a generated,
+# GIN-indexed tsvector column on PostgreSQL, an FTS5 table kept in sync by
+# triggers on SQLite. Other databases keep the icontains SearchFilter.
+
+from django.db import migrations, transaction
+from django.db.utils import OperationalError
+
+from apps.tools.search import (
+    POSTGRES_DROP_SQL, POSTGRES_SEARCH_SQL, SQLITE_DROP_SQL, SQLITE_SEARCH_SQL,
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in POSTGRES_SEARCH_SQL:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for sql in SQLITE_SEARCH_SQL:
+                    schema_editor.execute(sql)
+        except OperationalError:
+            # SQLite built without FTS5: search falls back to icontains
+            pass
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_DROP_SQL
+    elif vendor == 'sqlite':
+        statements = SQLITE_DROP_SQL
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0004_tool_ratings'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
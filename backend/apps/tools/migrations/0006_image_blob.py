@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0005_tool_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('variants', models.JSONField(default=dict, help_text='{variant: {name, url}} for each stored WebP variant')),
+                ('width', models.IntegerField(default=0)),
+                ('height', models.IntegerField(default=0)),
+                ('size', models.BigIntegerField(default=0, help_text='Original upload size in bytes')),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'image_blobs',
+                'indexes': [models.Index(fields=['ref_count', 'created_at'], name='image_blobs_ref_cou_6015a5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 04:10
+#
+# Rebuild the SQLite FTS5 index keyed by rowid (see apps.tools.search): the
+# first version looked rows up by an UNINDEXED tool_id column, a full scan
+# of the index on every update and delete. PostgreSQL is unchanged.
+
+from django.db import migrations, transaction
+from django.db.utils import OperationalError
+
+from apps.tools.search import SQLITE_DROP_SQL, SQLITE_SEARCH_SQL
+
+
+def rebuild_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for sql in SQLITE_DROP_SQL + SQLITE_SEARCH_SQL:
+                schema_editor.execute(sql)
+    except OperationalError:
+        # SQLite built without FTS5: search falls back to icontains
+        pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0006_image_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
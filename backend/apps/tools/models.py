@@ -1,6 +1,6 @@
 import uuid
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.shops.models import Shop
 
@@ -127,6 +127,16 @@ class Tool(models.Model):
     # Availability
     is_available = models.BooleanField(default=True)
     
+    # Ratings (maintained incrementally by Review writes)
+    rating_average = models.DecimalField(
+        max_digits=3,
+        decimal_places=2,
+        default=0.00,
+        validators=[MinValueValidator(0.00)]
+    )
+    total_ratings = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -198,11 +208,72 @@ class Review(models.Model):
     def __str__(self):
         return f"Review by {self.reviewer.username} - {self.rating}★"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._rated = instance._rating_contribution()
+        return instance
+    
+    def _rating_contribution(self):
+        """(shop_id, tool_id, rating) this review currently counts towards"""
+        return (self.shop_id, self.tool_id, self.rating)
+    
+    def _apply_rating(self, contribution, sign):
+        from apps.tools.ratings import adjust_rating
+        shop_id, tool_id, rating = contribution
+        adjust_rating(Shop, shop_id, sign, sign * rating)
+        adjust_rating(Tool, tool_id, sign, sign * rating)
+    
     def save(self, *args, **kwargs):
-        """Update shop/tool ratings after saving review"""
-        super().save(*args, **kwargs)
-        if self.shop:
-            self.shop.update_rating()
-        if self.tool:
-            # Update tool rating if needed
-            pass
+        """Apply this review's rating delta to its shop and tool aggregates"""
+        previous = None if self._state.adding else getattr(self, '_rated', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            current = self._rating_contribution()
+            if previous != current:
+                if previous is not None:
+                    self._apply_rating(previous, -1)
+                self._apply_rating(current, 1)
+        self._rated = current
+
+
+class ImageBlob(models.Model):
+    """
+    A processed tool image stored under its content hash (see
+    apps.tools.images). Identical uploads share one blob; ``ref_count``
+    counts the Tool.images entries pointing at it.
+    """
+    
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    variants = models.JSONField(
+        default=dict,
+        help_text="{variant: {name, url}} for each stored WebP variant"
+    )
+    width = models.IntegerField(default=0)
+    height = models.IntegerField(default=0)
+    size = models.BigIntegerField(default=0, help_text="Original upload size in bytes")
+    ref_count = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'image_blobs'
+        indexes = [
+            models.Index(fields=['ref_count', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+    
+    def entry(self, image_id):
+        """The Tool.images entry for this blob"""
+        entry = {
+            'id': image_id,
+            'status': 'ready',
+            'sha256': self.sha256,
+            'width': self.width,
+            'height': self.height,
+        }
+        for variant, stored in self.variants.items():
+            entry[variant] = stored['url']
+        return entry
@@ -0,0 +1,140 @@
+"""
+Rental pricing.
+
+A window is billed in whole hours, rounded up and never less than the
+tool's ``minimum_rental_duration``, and priced as the cheapest mix of its
+weekly, daily and hourly rates that covers those hours. Covering more time
+than rented is allowed when it is cheaper: with a day rate below 20 hourly
+rates, a 20-hour rental is priced as one day. Rates a tool does not have
+(hourly and weekly are optional) are simply not used.
+
+``RateTable`` holds one tool's rates and memoizes prices per billed hours,
+so quoting many windows for the same tools costs one query for the tools
+and a handful of Decimal operations per distinct duration.
+"""
+import math
+from decimal import Decimal
+
+HOURS_PER_DAY = 24
+HOURS_PER_WEEK = 7 * HOURS_PER_DAY
+CENTS = Decimal('0.01')
+
+# Most (tool, window, quantity) items priced by one quote request
+QUOTE_MAX_ITEMS = 100
+
+
+class RateTable:
+    """The rates of one tool, with prices memoized per billed hours"""
+
+    def __init__(self, price_per_day, price_per_hour=None, price_per_week=None,
+                 minimum_hours=1, deposit_amount=Decimal('0')):
+        self.price_per_day = Decimal(price_per_day)
+        self.price_per_hour = Decimal(price_per_hour) if price_per_hour is not None else None
+        self.price_per_week = Decimal(price_per_week) if price_per_week is not None else None
+        self.minimum_hours = max(minimum_hours or 1, 1)
+        self.deposit_amount = Decimal(deposit_amount or 0).quantize(CENTS)
+        self._prices = {}
+
+    @classmethod
+    def for_tool(cls, tool):
+        return cls(
+            tool.price_per_day,
+            price_per_hour=tool.price_per_hour,
+            price_per_week=tool.price_per_week,
+            minimum_hours=tool.minimum_rental_duration,
+            deposit_amount=tool.deposit_amount,
+        )
+
+    def billed_hours(self, start, end):
+        hours = math.ceil((end - start).total_seconds() / 3600)
+        return max(hours, self.minimum_hours)
+
+    def _days_and_hours(self, hours):
+        """Cheapest (cost, days, hours) covering ``hours`` without weeks"""
+        full_days, rest = divmod(hours, HOURS_PER_DAY)
+        ceil_days = full_days + (1 if rest else 0)
+        if self.price_per_hour is None:
+            return ceil_days * self.price_per_day, ceil_days, 0
+        # Cost is linear in the number of days up to covering everything,
+        # so the optimum is at an end: no days, whole days, or rounding up
+        return min(
+            (days * self.price_per_day + max(hours - days * HOURS_PER_DAY, 0) * self.price_per_hour,
+             days, max(hours - days * HOURS_PER_DAY, 0))
+            for days in {0, full_days, ceil_days}
+        )
+
+    def price(self, hours):
+        """
+        Cheapest price for ``hours`` billed hours per unit. Returns
+        (amount, {'weeks': w, 'days': d, 'hours': h}).
+        """
+        if hours not in self._prices:
+            max_weeks = math.ceil(hours / HOURS_PER_WEEK) if self.price_per_week is not None else 0
+            best = None
+            for weeks in range(max_weeks + 1):
+                cost, days, rest = self._days_and_hours(max(hours - weeks * HOURS_PER_WEEK, 0))
+                if weeks:
+                    cost += weeks * self.price_per_week
+                if best is None or cost < best[0]:
+                    best = (cost, weeks, days, rest)
+            cost, weeks, days, rest = best
+            self._prices[hours] = (
+                cost.quantize(CENTS), {'weeks': weeks, 'days': days, 'hours': rest}
+            )
+        return self._prices[hours]
+
+    def quote(self, start, end, quantity=1):
+        """Price ``quantity`` units for the window, plus the deposit"""
+        hours = self.billed_hours(start, end)
+        unit_price, breakdown = self.price(hours)
+        subtotal = unit_price * quantity
+        return {
+            'billed_hours': hours,
+            'breakdown': breakdown,
+            'unit_price': unit_price,
+            'subtotal': subtotal,
+            'deposit_amount': self.deposit_amount,
+            'total_amount': subtotal + self.deposit_amount,
+        }
+
+
+def rate_tables(tools):
+    """{tool id: RateTable} for ``tools``"""
+    return {tool.id: RateTable.for_tool(tool) for tool in tools}
+
+
+RATE_FIELDS = (
+    'id', 'price_per_hour', 'price_per_day', 'price_per_week',
+    'minimum_rental_duration', 'deposit_amount',
+)
+
+
+def quote_many(queryset, items):
+    """
+    Price a batch of dicts with tool_id, start_datetime, end_datetime and
+    quantity against the tools in ``queryset``, loading them in one query.
+    Returns one result per item, in order; unknown tools get an error.
+    """
+    tool_ids = {item['tool_id'] for item in items}
+    tables = rate_tables(queryset.filter(id__in=tool_ids).select_related(None).prefetch_related(None).only(*RATE_FIELDS))
+
+    results = []
+    for item in items:
+        result = {
+            'tool_id': item['tool_id'],
+            'start_datetime': item['start_datetime'],
+            'end_datetime': item['end_datetime'],
+            'quantity': item['quantity'],
+        }
+        table = tables.get(item['tool_id'])
+        if table is None:
+            result['error'] = 'Tool not found'
+        else:
+            quote = table.quote(item['start_datetime'], item['end_datetime'], item['quantity'])
+            # Amounts as strings, like DecimalField in the rest of the API
+            result.update({
+                key: str(value) if isinstance(value, Decimal) else value
+                for key, value in quote.items()
+            })
+        results.append(result)
+    return results
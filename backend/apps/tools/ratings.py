@@ -0,0 +1,67 @@
+"""
+Incremental rating aggregates for shops and tools.
+
+Each rated model keeps ``total_ratings``, ``rating_sum`` and the derived
+``rating_average``. Review writes adjust them with a single conditional
+UPDATE using F() expressions, so the cost of a write no longer grows with
+the number of reviews. ``manage.py recompute_ratings`` repairs any drift.
+"""
+from django.db.models import Case, Count, DecimalField, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast, Now
+from core.cache import bump
+
+AVERAGE_FIELD = DecimalField(max_digits=3, decimal_places=2)
+
+
+def adjust_rating(model, pk, count_delta, sum_delta):
+    """Atomically add ``count_delta`` ratings totalling ``sum_delta`` to one row"""
+    if pk is None or (count_delta == 0 and sum_delta == 0):
+        return
+    new_count = F('total_ratings') + count_delta
+    new_sum = F('rating_sum') + sum_delta
+    model.objects.filter(pk=pk).update(
+        total_ratings=new_count,
+        rating_sum=new_sum,
+        # Evaluated against the pre-update row, like the other assignments
+        rating_average=Case(
+            When(total_ratings__lte=-count_delta, then=Value(0)),
+            default=Cast(
+                Cast(new_sum, FloatField()) / Cast(new_count, FloatField()),
+                AVERAGE_FIELD
+            ),
+            output_field=AVERAGE_FIELD,
+        ),
+        updated_at=Now(),
+    )
+    bump('shops', 'tools')
+
+
+def recompute_ratings(model, review_field, batch_size=500):
+    """
+    Recompute the aggregates of every ``model`` row from its reviews in bulk.
+    Returns the number of rows that had drifted.
+    """
+    from apps.tools.models import Review
+
+    totals = {
+        row[review_field]: (row['count'], row['total'])
+        for row in Review.objects.filter(**{f'{review_field}__isnull': False})
+        .values(review_field)
+        .annotate(count=Count('id'), total=Sum('rating'))
+    }
+
+    drifted = []
+    rows = model.objects.only('id', 'total_ratings', 'rating_sum', 'rating_average')
+    for obj in rows.iterator(chunk_size=batch_size):
+        count, total = totals.get(obj.pk, (0, 0))
+        average = round(total / count, 2) if count else 0
+        if (obj.total_ratings, obj.rating_sum, float(obj.rating_average)) != (count, total, average):
+            obj.total_ratings, obj.rating_sum, obj.rating_average = count, total, average
+            drifted.append(obj)
+
+    model.objects.bulk_update(
+        drifted, ['total_ratings', 'rating_sum', 'rating_average'], batch_size=batch_size
+    )
+    if drifted:
+        bump('shops', 'tools')
+    return len(drifted)
@@ -0,0 +1,185 @@
+"""
+Full-text search over tools.
+
+Instead of ``ILIKE '%term%'`` across four columns, ``?search=`` is answered
+from a database text index:
+
+* PostgreSQL: a generated, GIN-indexed ``tools.search_vector`` tsvector
+  (name weighted highest, then brand/model number, then description),
+  matched with ``to_tsquery`` and ranked with ``ts_rank``.
+* SQLite: an FTS5 table ``tools_fts`` kept in sync by triggers, keyed by
+  rowid through the ``tools_fts_ids`` map, matched with ``MATCH`` and
+  ranked with ``bm25`` looked up by rowid.
+
+Every search term is matched as a prefix, so partial words work for
+typeahead. Results are ordered by rank unless the client passes an explicit
+``?ordering=``. Other databases (or SQLite builds without FTS5) fall back to
+DRF's ``SearchFilter``. Both indexes are created by migration
+``tools.0005_tool_search_index`` (the SQLite one rebuilt in its current
+form by ``tools.0007_tool_search_rowid``) and are maintained by the database on every
+Tool write.
+"""
+import re
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+SEARCH_CONFIG = 'english'
+
+POSTGRES_SEARCH_SQL = [
+    f"""
+    ALTER TABLE tools ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(brand, '') || ' ' || coalesce(model_number, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS tools_search_vector_gin ON tools USING GIN (search_vector)",
+]
+
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS tools_search_vector_gin",
+    "ALTER TABLE tools DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_SEARCH_SQL = [
+    # Tool ids are UUIDs and a plain table's implicit rowid may change on
+    # VACUUM, so FTS rows are keyed by a stable integer from this map
+    """
+    CREATE TABLE IF NOT EXISTS tools_fts_ids (
+        id INTEGER PRIMARY KEY,
+        tool_id TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tools_fts USING fts5(
+        name, brand, model_number, description,
+        tokenize = 'porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tools_fts_insert AFTER INSERT ON tools BEGIN
+        INSERT INTO tools_fts_ids (tool_id) VALUES (NEW.id);
+        INSERT INTO tools_fts (rowid, name, brand, model_number, description)
+        VALUES ((SELECT id FROM tools_fts_ids WHERE tool_id = NEW.id),
+                NEW.name, NEW.brand, NEW.model_number, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tools_fts_update AFTER UPDATE OF
+        name, brand, model_number, description ON tools BEGIN
+        UPDATE tools_fts SET name = NEW.name, brand = NEW.brand,
+            model_number = NEW.model_number, description = NEW.description
+        WHERE rowid = (SELECT id FROM tools_fts_ids WHERE tool_id = OLD.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tools_fts_delete AFTER DELETE ON tools BEGIN
+        DELETE FROM tools_fts WHERE rowid = (SELECT id FROM tools_fts_ids WHERE tool_id = OLD.id);
+        DELETE FROM tools_fts_ids WHERE tool_id = OLD.id;
+    END
+    """,
+    "INSERT INTO tools_fts_ids (tool_id) SELECT id FROM tools",
+    """
+    INSERT INTO tools_fts (rowid, name, brand, model_number, description)
+    SELECT ids.id, tools.name, tools.brand, tools.model_number, tools.description
+    FROM tools JOIN tools_fts_ids AS ids ON ids.tool_id = tools.id
+    """,
+]
+
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS tools_fts_insert",
+    "DROP TRIGGER IF EXISTS tools_fts_update",
+    "DROP TRIGGER IF EXISTS tools_fts_delete",
+    "DROP TABLE IF EXISTS tools_fts",
+    "DROP TABLE IF EXISTS tools_fts_ids",
+]
+
+# bm25 column weights for (name, brand, model_number, description)
+SQLITE_RANK_WEIGHTS = '10.0, 5.0, 5.0, 1.0'
+
+
+def search_tokens(terms):
+    """Split search terms into word tokens safe to embed in a text query"""
+    tokens = []
+    for term in terms:
+        tokens.extend(re.findall(r'\w+', term))
+    return tokens
+
+
+_sqlite_fts = None
+
+
+def search_backend():
+    """Return 'postgresql', 'sqlite' or None when no text index is available"""
+    global _sqlite_fts
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite':
+        if _sqlite_fts is None:
+            _sqlite_fts = 'tools_fts' in connection.introspection.table_names()
+        return 'sqlite' if _sqlite_fts else None
+    return None
+
+
+def postgres_search(queryset, tokens):
+    query = ' & '.join(f'{token}:*' for token in tokens)
+    match = RawSQL(
+        f'"tools"."search_vector" @@ to_tsquery(\'{SEARCH_CONFIG}\', %s)',
+        [query], output_field=BooleanField()
+    )
+    rank = RawSQL(
+        f'ts_rank("tools"."search_vector", to_tsquery(\'{SEARCH_CONFIG}\', %s))',
+        [query], output_field=FloatField()
+    )
+    return queryset.filter(match).annotate(search_rank=rank)
+
+
+def sqlite_search(queryset, tokens):
+    query = ' '.join(f'"{token}"*' for token in tokens)
+    match = RawSQL(
+        'SELECT tools_fts_ids.tool_id FROM tools_fts '
+        'JOIN tools_fts_ids ON tools_fts_ids.id = tools_fts.rowid '
+        'WHERE tools_fts MATCH %s',
+        [query]
+    )
+    # bm25() is lower-is-better, so negate it for a descending rank. The
+    # ranked matches are an uncorrelated derived table that SQLite builds
+    # once and probes per row; LIMIT -1 keeps it from being flattened into
+    # a MATCH per row
+    rank = RawSQL(
+        f'SELECT ranked.rank FROM (SELECT tools_fts_ids.tool_id, -bm25(tools_fts, {SQLITE_RANK_WEIGHTS}) AS rank '
+        'FROM tools_fts JOIN tools_fts_ids ON tools_fts_ids.id = tools_fts.rowid '
+        'WHERE tools_fts MATCH %s LIMIT -1) AS ranked WHERE ranked.tool_id = "tools"."id"',
+        [query], output_field=FloatField()
+    )
+    return queryset.filter(pk__in=match).annotate(search_rank=rank)
+
+
+class ToolSearchFilter(SearchFilter):
+    """
+    ``?search=`` backed by the full-text index, with prefix matching and
+    rank ordering. Must come after OrderingFilter in ``filter_backends`` so
+    rank ordering can take precedence over the view's default ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        backend = search_backend()
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+
+        tokens = search_tokens(self.get_search_terms(request))
+        if not tokens:
+            return queryset
+
+        if backend == 'postgresql':
+            queryset = postgres_search(queryset, tokens)
+        else:
+            queryset = sqlite_search(queryset, tokens)
+
+        if api_settings.ORDERING_PARAM in request.query_params:
+            return queryset
+        return queryset.order_by('-search_rank', *queryset.query.order_by)
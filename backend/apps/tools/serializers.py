@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from apps.tools.models import Tool, ToolCategory, Review
+from apps.tools.pricing import QUOTE_MAX_ITEMS
 from apps.shops.serializers import ShopSerializer
 
 
@@ -32,9 +33,19 @@ class ToolSerializer(serializers.ModelSerializer):
             'price_per_hour', 'price_per_day', 'price_per_week',
             'minimum_rental_duration', 'deposit_amount',
             'specifications', 'is_available',
+            'rating_average', 'total_ratings',
             'created_at', 'updated_at', 'in_stock'
         ]
-        read_only_fields = ['id', 'shop', 'created_at', 'updated_at', 'in_stock']
+        read_only_fields = [
+            'id', 'shop', 'rating_average', 'total_ratings',
+            'created_at', 'updated_at', 'in_stock'
+        ]
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset, prefix=''):
+        """Join shop and category, then the shop's own needs"""
+        queryset = queryset.select_related(f'{prefix}shop', f'{prefix}category')
+        return ShopSerializer.setup_eager_loading(queryset, prefix=f'{prefix}shop__')
 
 
 class ToolCreateSerializer(serializers.ModelSerializer):
@@ -49,6 +60,8 @@ class ToolCreateSerializer(serializers.ModelSerializer):
             'minimum_rental_duration', 'deposit_amount',
             'specifications', 'is_available'
         ]
+        # Managed by the upload pipeline (apps.tools.images)
+        read_only_fields = ['images']
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -71,3 +84,25 @@ class ReviewSerializer(serializers.ModelSerializer):
         validated_data['reviewer'] = self.context['request'].user
         review = super().create(validated_data)
         return review
+
+
+class QuoteItemSerializer(serializers.Serializer):
+    """One (tool, window, quantity) to price"""
+    
+    tool_id = serializers.UUIDField()
+    start_datetime = serializers.DateTimeField()
+    end_datetime = serializers.DateTimeField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+    
+    def validate(self, attrs):
+        if attrs['start_datetime'] >= attrs['end_datetime']:
+            raise serializers.ValidationError({
+                'end_datetime': 'End time must be after start time'
+            })
+        return attrs
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    """Batch of items for the tool quote endpoint"""
+    
+    items = QuoteItemSerializer(many=True, allow_empty=False, max_length=QUOTE_MAX_ITEMS)
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.tools import suggest
+from apps.tools.images import release_images
+from core.cache import bump
+
+
+@receiver([post_save, post_delete], sender='tools.Tool')
+def invalidate_tool_caches(sender, **kwargs):
+    # Shop detail counts its tools
+    bump('tools', 'shops')
+    suggest.invalidate()
+
+
+@receiver(post_delete, sender='tools.Tool')
+def release_tool_images(sender, instance, **kwargs):
+    release_images(instance.images)
+
+
+@receiver([post_save, post_delete], sender='tools.ToolCategory')
+def invalidate_category_caches(sender, **kwargs):
+    bump('categories', 'tools')
+    suggest.invalidate()
+
+
+@receiver([post_save, post_delete], sender='tools.Review')
+def invalidate_review_caches(sender, **kwargs):
+    bump('reviews', 'shops', 'tools')
+
+
+@receiver(post_delete, sender='tools.Review')
+def remove_review_rating(sender, instance, **kwargs):
+    # Also runs for queryset deletes and cascades from bookings, tools and
+    # shops, which never call Review.delete()
+    contribution = getattr(instance, '_rated', None) or instance._rating_contribution()
+    instance._apply_rating(contribution, -1)
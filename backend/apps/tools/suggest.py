@@ -0,0 +1,166 @@
+"""
+In-memory prefix index for search-as-you-type suggestions.
+
+Names and brands of publicly listed tools plus category names are loaded
+into a sorted list of (key, text) pairs, with one key per word start so
+"dri" matches both "Drill" and "Hammer Drill". A prefix lookup is a bisect
+into that list followed by a bounded forward scan, and the last few hundred
+answers are kept in an LRU keyed on the normalized prefix.
+
+Writes call ``invalidate()``, which bumps the ``suggest`` cache namespace
+(core.cache) once they commit, so every worker sees the change. A worker
+whose index was built from an older version, or is older than
+INDEX_TTL_SECONDS, keeps answering from it while one background thread
+builds the replacement; only the very first lookup builds synchronously.
+"""
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from django.db import connection
+from core.cache import bump, namespace_versions
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_LIMIT = 10
+INDEX_TTL_SECONDS = 300
+CACHE_SIZE = 512
+
+# Upper bound on index entries inspected per lookup (keeps short prefixes fast)
+MAX_SCAN = 500
+
+WORD_START = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+class SuggestIndex:
+    """Sorted prefix index with a per-prefix LRU of results"""
+
+    def __init__(self, texts, version=0):
+        weights = Counter()
+        display = {}
+        for text in texts:
+            text = ' '.join((text or '').split())
+            if not text:
+                continue
+            key = normalize(text)
+            weights[key] += 1
+            display.setdefault(key, text)
+
+        entries = set()
+        for key in display:
+            for match in WORD_START.finditer(key):
+                entries.add((key[match.start():], key))
+
+        self.entries = sorted(entries)
+        self.keys = [entry[0] for entry in self.entries]
+        self.weights = weights
+        self.display = display
+        self.version = version
+        self.built_at = time.monotonic()
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, prefix, limit=SUGGEST_LIMIT):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self.lock:
+            if prefix in self.cache:
+                self.cache.move_to_end(prefix)
+                return self.cache[prefix][:limit]
+
+        matches = set()
+        start = bisect_left(self.keys, prefix)
+        for key, text_key in self.entries[start:start + MAX_SCAN]:
+            if not key.startswith(prefix):
+                break
+            matches.add(text_key)
+
+        # Whole-text prefix matches first, then the most common, then A-Z
+        ranked = sorted(
+            matches,
+            key=lambda k: (not k.startswith(prefix), -self.weights[k], k)
+        )
+        result = [self.display[k] for k in ranked[:SUGGEST_LIMIT]]
+
+        with self.lock:
+            self.cache[prefix] = result
+            if len(self.cache) > CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return result[:limit]
+
+
+def _version():
+    return namespace_versions(('suggest',))[0]
+
+
+def build_index():
+    from apps.shops.visibility import publicly_listed_q
+    from apps.tools.models import Tool, ToolCategory
+
+    # Read before loading, so writes committed during the build trigger
+    # another one
+    version = _version()
+    texts = []
+    rows = Tool.objects.filter(is_available=True).filter(
+        publicly_listed_q(prefix='shop__')
+    ).values_list('name', 'brand')
+    for name, brand in rows.iterator(chunk_size=2000):
+        texts.append(name)
+        texts.append(brand)
+    texts.extend(ToolCategory.objects.values_list('name', flat=True))
+    return SuggestIndex(texts, version)
+
+
+_index = None
+_build_lock = threading.Lock()
+
+
+def _rebuild():
+    global _index
+    try:
+        _index = build_index()
+    except Exception:
+        logger.exception('Rebuilding the suggestion index failed')
+    finally:
+        connection.close()
+        _build_lock.release()
+
+
+def get_index():
+    """
+    Return the current index. A stale one is returned as is while a
+    background rebuild replaces it.
+    """
+    global _index
+    index = _index
+    if index is None:
+        with _build_lock:
+            if _index is None:
+                _index = build_index()
+            return _index
+
+    stale = index.version != _version() or time.monotonic() - index.built_at > INDEX_TTL_SECONDS
+    if stale and _build_lock.acquire(blocking=False):
+        if _index is not index:
+            # Replaced since it was read
+            _build_lock.release()
+        else:
+            threading.Thread(target=_rebuild, name='suggest-index', daemon=True).start()
+    return index
+
+
+def invalidate():
+    """Have every worker rebuild its index once the current transaction commits"""
+    bump('suggest')
+
+
+def suggest(prefix, limit=SUGGEST_LIMIT):
+    return get_index().lookup(prefix, min(limit, SUGGEST_LIMIT))
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.bookings.models import Booking
+from apps.shops.models import Shop
+from apps.tools.models import Review, Tool, ToolCategory
+
+
+def make_tool(**fields):
+    owner = get_user_model().objects.create_user(
+        username='owner', email='owner@example.com', password='pw', user_type='provider'
+    )
+    shop = Shop.objects.create(
+        owner=owner, name='Shop', address='Street 1', location_lat=12.97,
+        location_lng=77.59, phone='1', email='shop@example.com'
+    )
+    return Tool.objects.create(
+        shop=shop, category=ToolCategory.objects.first(), name='Drill',
+        description='Cordless drill', price_per_day=100, **fields
+    )
+
+
+class GcImagesTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+    def write(self, name):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'image')
+        os.utime(path, (0, 0))
+        return path
+
+    def test_keeps_legacy_image_with_encoded_name(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            make_tool(images=['/media/tools/cordless%20drill.jpg'])
+            kept = self.write('tools/cordless drill.jpg')
+            orphan = self.write('tools/unused.jpg')
+
+            call_command('gc_images', grace_hours=0, stdout=StringIO())
+
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_fails_images_whose_processing_was_lost(self):
+        now = timezone.now()
+        tool = make_tool(images=[
+            {'id': 'lost', 'status': 'processing', 'queued_at': (now - timedelta(hours=2)).isoformat()},
+            {'id': 'running', 'status': 'processing', 'queued_at': now.isoformat()},
+            {'id': 'legacy', 'status': 'processing'},
+        ])
+        # Placeholders without queued_at go by the tool's last write
+        Tool.objects.filter(pk=tool.pk).update(updated_at=now - timedelta(hours=2))
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            call_command('gc_images', stalled_minutes=30, stdout=StringIO())
+
+        tool.refresh_from_db()
+        self.assertEqual(
+            {image['id']: image['status'] for image in tool.images},
+            {'lost': 'failed', 'running': 'processing', 'legacy': 'failed'}
+        )
+
+
+class ReviewRatingTests(TestCase):
+    def review(self, tool, rating):
+        renter = get_user_model().objects.create_user(
+            username=f'renter{rating}', email=f'renter{rating}@example.com', password='pw'
+        )
+        start = timezone.now() + timedelta(days=1)
+        booking = Booking.objects.create(
+            renter=renter, tool=tool, shop=tool.shop, start_datetime=start,
+            end_datetime=start + timedelta(days=1), duration_hours=24,
+            rental_price=Decimal('100'), status='returned'
+        )
+        return Review.objects.create(
+            booking=booking, reviewer=renter, shop=tool.shop, tool=tool, rating=rating
+        )
+
+    def test_deleting_tool_removes_its_reviews_from_shop_rating(self):
+        tool = make_tool()
+        self.review(tool, 5)
+        self.review(tool, 3)
+        shop = tool.shop
+        shop.refresh_from_db()
+        self.assertEqual((shop.total_ratings, shop.rating_sum), (2, 8))
+
+        tool.delete()
+
+        shop.refresh_from_db()
+        self.assertEqual((shop.total_ratings, shop.rating_sum, shop.rating_average), (0, 0, 0))
+
+    def test_queryset_delete_updates_ratings(self):
+        tool = make_tool()
+        self.review(tool, 4)
+        self.review(tool, 2)
+
+        Review.objects.filter(rating=2).delete()
+
+        tool.refresh_from_db()
+        self.assertEqual((tool.total_ratings, tool.rating_sum, tool.rating_average), (1, 4, 4))
@@ -1,32 +1,56 @@
+import uuid
 from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.core.files.storage import default_storage
-from django.db import models
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+from datetime import timedelta
 from apps.tools.models import Tool, ToolCategory, Review
+from apps.tools.facets import tool_facets
+from apps.tools.pricing import quote_many
+from apps.tools.images import queue_uploads, release_images
+from apps.tools.search import ToolSearchFilter
+from apps.tools.suggest import suggest
+from apps.shops.geo import filter_nearby
+from apps.shops.visibility import publicly_listed_q
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.mixins import EagerLoadingMixin
+from apps.bookings.availability import daily_free_units, parse_window, reserved_units
 from .serializers import (
-    ToolSerializer, ToolCreateSerializer, ToolCategorySerializer, ReviewSerializer
+    ToolSerializer, ToolCreateSerializer, ToolCategorySerializer, ReviewSerializer,
+    QuoteRequestSerializer
 )
-import math  # Must be top-level — used in nearby() before any local import
 
 
-class ToolCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+# Bounds for the batch availability calendar
+CALENDAR_MAX_TOOLS = 100
+CALENDAR_MAX_DAYS = 62
+
+
+class ToolCategoryViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for ToolCategory (read-only)"""
     
     queryset = ToolCategory.objects.all()
+    cache_namespaces = ('categories',)
+    cache_shared = True
     serializer_class = ToolCategorySerializer
     permission_classes = [AllowAny]
 
 
-class ToolViewSet(viewsets.ModelViewSet):
+class ToolViewSet(ConditionalGetMixin, CachedResponseMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     """ViewSet for Tool CRUD operations"""
     
     queryset = Tool.objects.all()
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['category', 'condition', 'shop', 'is_available']
+    cache_namespaces = ('tools', 'shops', 'categories')
+    cache_shared = True
+    # ToolSearchFilter goes last so search rank can override default ordering
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ToolSearchFilter]
+    filterset_fields = ['category', 'condition', 'brand', 'shop', 'is_available']
     search_fields = ['name', 'description', 'brand', 'model_number']
     ordering_fields = ['price_per_day', 'created_at']
     ordering = ['-created_at']
@@ -37,42 +61,29 @@ class ToolViewSet(viewsets.ModelViewSet):
         return ToolSerializer
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'nearby']:
+        if self.action in ['list', 'retrieve', 'nearby', 'availability', 'calendar', 'suggest', 'quote']:
             return [AllowAny()]
         return [IsAuthenticated()]
     
     def get_queryset(self):
         """
         Get all available tools from subscribed providers or admins.
-        Uses a subquery to avoid JOIN issues with missing subscription data.
+        Visibility is materialized on Shop (see apps.shops.visibility), so this
+        is a single indexed filter on the joined shop with no DISTINCT.
         """
-        from django.utils import timezone
-        
-        # We wrap in a try-except in case the subscriptions table is missing during migrations,
-        # but in normal operation we want to filter tightly.
-        try:
-            from apps.subscriptions.models import Subscription
-            # Get IDs of users with active subscriptions
-            subscribed_user_ids = Subscription.objects.filter(
-                status='active',
-                end_date__gt=timezone.now()
-            ).values_list('user_id', flat=True)
-
-            return Tool.objects.select_related('shop', 'category').filter(
-                is_available=True
-            ).filter(
-                models.Q(shop__owner__is_superuser=True) |
-                models.Q(shop__owner_id__in=subscribed_user_ids)
-            ).distinct()
-        except:
-            # Fallback for migrations
-            return Tool.objects.none()
+        return self.eager_load(Tool.objects.select_related('shop', 'category').filter(
+            is_available=True
+        ).filter(publicly_listed_q(prefix='shop__')))
+
+    def get_paginated_response(self, data):
+        """With ?facets=1 the list also returns grouped counts for the filtered set"""
+        response = super().get_paginated_response(data)
+        if self.action == 'list' and self.request.query_params.get('facets') in ('1', 'true'):
+            response.data['facets'] = tool_facets(self.filter_queryset(self.get_queryset()))
+        return response
 
     def perform_create(self, serializer):
         """Validate user has a shop and active subscription before creating tool"""
-        from django.core.files.storage import default_storage
-        from django.utils import timezone
-        
         user = self.request.user
         
         # Check if user is a provider or superuser
@@ -88,24 +99,17 @@ class ToolViewSet(viewsets.ModelViewSet):
         if not shop:
             raise serializers.ValidationError({"shop": "You must create a shop first"})
             
-        # Handle image upload
-        # Frontend sends 'image' (single file), Model expects 'images' (list of URLs)
-        image = self.request.FILES.get('image')
-        images_list = []
-        
-        if image:
-            # Save file to media directory
-            file_path = default_storage.save(f'tools/{image.name}', image)
-            # Get URL (ensure it starts with /media/ if not already)
-            file_url = default_storage.url(file_path)
-            images_list = [file_url]
-            
+        # Images are staged now and processed off-request (apps.tools.images)
+        uploads = self.request.FILES.getlist('images') or self.request.FILES.getlist('image')
+        tool_id = uuid.uuid4()
         quantity_available = serializer.validated_data.get('quantity_available', 1)
-        serializer.save(
-            shop=shop, 
-            images=images_list,
-            quantity_total=quantity_available
-        )
+        with transaction.atomic():
+            serializer.save(
+                id=tool_id,
+                shop=shop, 
+                images=queue_uploads(tool_id, uploads),
+                quantity_total=quantity_available
+            )
 
     def _check_ownership(self, tool):
         """Raise PermissionDenied if the requesting user does not own this tool's shop."""
@@ -116,14 +120,18 @@ class ToolViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         self._check_ownership(serializer.instance)
-        # Handle optional image upload on update
-        image = self.request.FILES.get('image')
-        if image:
-            file_path = default_storage.save(f'tools/{image.name}', image)
-            file_url = default_storage.url(file_path)
-            serializer.save(images=[file_url])
-        else:
+        # Uploaded images replace the current ones once processed
+        uploads = self.request.FILES.getlist('images') or self.request.FILES.getlist('image')
+        if not uploads:
             serializer.save()
+            return
+        old_images = serializer.instance.images
+        # New references are taken before the old ones are dropped, so
+        # re-uploading an attached image never frees its blob; a failed
+        # save rolls the new references back
+        with transaction.atomic():
+            serializer.save(images=queue_uploads(serializer.instance.id, uploads))
+            release_images(old_images)
 
     def perform_destroy(self, instance):
         self._check_ownership(instance)
@@ -133,13 +141,13 @@ class ToolViewSet(viewsets.ModelViewSet):
     def my_tools(self, request):
         """Get all tools belonging to the logged-in provider's shops (ignores subscription filter)."""
         shops = request.user.shops.all()
-        tools = Tool.objects.select_related('shop', 'category').filter(shop__in=shops)
+        tools = self.eager_load(Tool.objects.filter(shop__in=shops))
         page = self.paginate_queryset(tools)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(self.serialized_data(serializer))
         serializer = self.get_serializer(tools, many=True)
-        return Response(serializer.data)
+        return Response(self.serialized_data(serializer))
 
 
     @action(detail=False, methods=['get'])
@@ -164,43 +172,124 @@ class ToolViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Filter by shop location using get_queryset() to maintain subscription/availability rules
-        lat_range = radius / 111.0
-        lng_range = radius / (111.0 * max(abs(math.cos(math.radians(lat))), 0.0001))
+        # Filter by shop location using get_queryset() to maintain subscription/availability rules.
+        # The geo backend filters and orders by distance in the database,
+        # so only the requested page is loaded.
+        tools = filter_nearby(self.get_queryset(), lat, lng, radius, prefix='shop__')
+        
+        page = self.paginate_queryset(tools)
+        if page is not None:
+            self._attach_distance(page)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(self.serialized_data(serializer))
         
-        tools = self.get_queryset().filter(
-            shop__location_lat__gte=lat - lat_range,
-            shop__location_lat__lte=lat + lat_range,
-            shop__location_lng__gte=lng - lng_range,
-            shop__location_lng__lte=lng + lng_range
+        tools = list(tools)
+        self._attach_distance(tools)
+        serializer = self.get_serializer(tools, many=True)
+        return Response(self.serialized_data(serializer))
+
+    @action(detail=True, methods=['get'])
+    def availability(self, request, pk=None):
+        """
+        Units free for the whole of a time window
+        Query params: start, end (ISO 8601 datetimes)
+        """
+        tool = self.get_object()
+        start, end, error = parse_window(
+            request.query_params.get('start'),
+            request.query_params.get('end')
         )
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate actual distance using Haversine formula and sort
-        def get_distance(tool):
-            lat2 = tool.shop.location_lat
-            lon2 = tool.shop.location_lng
-            if lat2 is None or lon2 is None:
-                return float('inf')
-                
-            R = 6371  # Earth radius in km
-            dLat = math.radians(lat2 - lat)
-            dLon = math.radians(lon2 - lng)
-            a = math.sin(dLat/2) * math.sin(dLat/2) + \
-                math.cos(math.radians(lat)) * math.cos(math.radians(lat2)) * \
-                math.sin(dLon/2) * math.sin(dLon/2)
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-            return R * c
-            
-        tools_list = list(tools)
-        tools_list.sort(key=get_distance)
+        reserved = reserved_units(tool.id, start, end)
+        return Response({
+            'tool_id': str(tool.id),
+            'start': start,
+            'end': end,
+            'quantity_total': tool.quantity_total,
+            'reserved': reserved,
+            'available': max(tool.quantity_total - reserved, 0),
+        })
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Per-day free units for many tools at once
+        Query params: ids (comma-separated tool IDs), start, end (YYYY-MM-DD, inclusive)
+        Response is column-oriented: free[i][d] is tools[i] on dates[d].
+        """
+        ids = [
+            tool_id.strip()
+            for value in request.query_params.getlist('ids')
+            for tool_id in value.split(',')
+            if tool_id.strip()
+        ]
+        if not ids:
+            return Response({'error': 'ids parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > CALENDAR_MAX_TOOLS:
+            return Response(
+                {'error': f'At most {CALENDAR_MAX_TOOLS} tools per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        page = self.paginate_queryset(tools_list)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        try:
+            first_day = parse_date(request.query_params.get('start', ''))
+            last_day = parse_date(request.query_params.get('end', ''))
+        except ValueError:
+            first_day = last_day = None
+        if not first_day or not last_day or first_day > last_day:
+            return Response(
+                {'error': 'Valid start and end dates (YYYY-MM-DD) required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (last_day - first_day).days >= CALENDAR_MAX_DAYS:
+            return Response(
+                {'error': f'Date range cannot exceed {CALENDAR_MAX_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        serializer = self.get_serializer(tools_list, many=True)
-        return Response(serializer.data)
+        try:
+            tools = list(
+                self.get_queryset().filter(id__in=ids)
+                .select_related(None).prefetch_related(None).only('id', 'quantity_total')
+            )
+        except DjangoValidationError:
+            return Response({'error': 'Invalid tool ID'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        calendar = daily_free_units(tools, first_day, last_day)
+        day_count = (last_day - first_day).days + 1
+        return Response({
+            'dates': [first_day + timedelta(days=i) for i in range(day_count)],
+            'tools': [str(tool.id) for tool in tools],
+            'free': [calendar[tool.id] for tool in tools],
+        })
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Search-as-you-type suggestions from tool names, brands and categories
+        Query params: q (prefix). Returns at most 10 strings.
+        """
+        return Response({'suggestions': suggest(request.query_params.get('q', ''))})
+
+    @action(detail=False, methods=['post'])
+    def quote(self, request):
+        """
+        Exact prices for up to 100 (tool, window, quantity) items in one call
+        Body: {"items": [{"tool_id", "start_datetime", "end_datetime", "quantity"}]}
+        """
+        serializer = QuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({
+            'quotes': quote_many(self.get_queryset(), serializer.validated_data['items'])
+        })
+
+    @staticmethod
+    def _attach_distance(tools):
+        """Expose the annotated distance through ShopSerializer.get_distance"""
+        for tool in tools:
+            tool.shop.distance = tool.distance
 
 
 class ReviewViewSet(viewsets.ModelViewSet):
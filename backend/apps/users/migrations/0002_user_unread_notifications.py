@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+def backfill_unread(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Notification = apps.get_model('bookings', 'Notification')
+    counts = Notification.objects.filter(is_read=False).values('user_id').annotate(
+        count=models.Count('id')
+    ).values_list('user_id', 'count')
+    users = []
+    for user_id, count in counts:
+        users.append(User(id=user_id, unread_notifications=count))
+    User.objects.bulk_update(users, ['unread_notifications'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('bookings', '0004_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notifications',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_unread, migrations.RunPython.noop),
+    ]
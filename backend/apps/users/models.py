@@ -45,6 +45,9 @@ class User(AbstractUser):
     # Verification
     is_verified = models.BooleanField(default=False)
     
+    # Denormalized unread notification count (apps.bookings.notifications)
+    unread_notifications = models.IntegerField(default=0, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -60,6 +63,25 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Superuser flag as loaded, so save() can refresh shop listings
+        instance._loaded_is_superuser = instance.__dict__.get('is_superuser')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Refresh the user's shop listing state when superuser status changes"""
+        previous = getattr(self, '_loaded_is_superuser', None)
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        written = update_fields is None or 'is_superuser' in update_fields
+        if written and previous is not None and previous != self.is_superuser:
+            # Superuser-owned shops are always listed (apps.shops.visibility)
+            from apps.shops.visibility import refresh_listing
+            refresh_listing([self.pk])
+        self._loaded_is_superuser = self.is_superuser
+    
     @property
     def is_provider(self):
         """Check if user is a shop provider"""
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.db.models import Exists, OuterRef, Prefetch
+from apps.shops.models import Shop
 
 User = get_user_model()
 
@@ -21,8 +23,23 @@ class UserSerializer(serializers.ModelSerializer):
 
     has_shop = serializers.SerializerMethodField()
 
+    @classmethod
+    def setup_eager_loading(cls, queryset, prefix=''):
+        """Annotate has_shop on users, or prefetch shops for related users"""
+        if not prefix:
+            return queryset.annotate(
+                has_shop=Exists(Shop.objects.filter(owner=OuterRef('pk')))
+            )
+        return queryset.prefetch_related(
+            Prefetch(f'{prefix}shops', queryset=Shop.objects.only('id', 'owner_id'))
+        )
+
     def get_has_shop(self, obj):
-        return obj.shops.exists() if hasattr(obj, 'shops') else False
+        annotated = getattr(obj, 'has_shop', None)
+        if annotated is not None:
+            return annotated
+        # Served from the prefetch cache when set up by setup_eager_loading
+        return obj.shops.exists()
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -3,12 +3,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import get_user_model
+from core.mixins import EagerLoadingMixin
 from .serializers import UserSerializer, UserRegistrationSerializer, UserProfileSerializer
 
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """ViewSet for User CRUD operations"""
     
     queryset = User.objects.all()
@@ -18,8 +19,8 @@ class UserViewSet(viewsets.ModelViewSet):
         """Restrict non-admins to only their own user data"""
         user = self.request.user
         if user.is_authenticated and (user.is_staff or user.is_superuser):
-            return User.objects.all()
-        return User.objects.filter(pk=user.pk)
+            return self.eager_load(User.objects.all())
+        return self.eager_load(User.objects.filter(pk=user.pk))
     
     def get_permissions(self):
         """Custom permissions based on action"""
@@ -6,6 +6,8 @@ Supports both SQLite (local development) and PostgreSQL with PostGIS (production
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from corsheaders.defaults import default_headers
+import importlib.util
 import os
 
 # Build paths
@@ -54,6 +56,7 @@ if USE_POSTGIS:
     INSTALLED_APPS.insert(6, 'django.contrib.gis')
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -101,6 +104,36 @@ DATABASES = {
 if USE_POSTGIS and 'postgres' in DATABASES['default']['ENGINE']:
     DATABASES['default']['ENGINE'] = 'django.contrib.gis.db.backends.postgis'
 
+# Geo query engine (apps.shops.geo): PostGIS-native when the postgis backend is
+# active, grid-cell index with database-side Haversine otherwise
+GEO_BACKEND = 'postgis' if DATABASES['default']['ENGINE'] == 'django.contrib.gis.db.backends.postgis' else 'grid'
+
+# Cache: Redis when REDIS_URL is set and the redis client is installed,
+# per-process local memory otherwise (core.cache)
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_TTL = config('CACHE_TTL', default=300, cast=int)
+
+if REDIS_URL and importlib.util.find_spec('redis'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'toolsy',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'toolsy',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Request instrumentation (core.middleware.PerformanceMiddleware)
+PERF_SAMPLE_SIZE = config('PERF_SAMPLE_SIZE', default=5000, cast=int)
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default='True', cast=bool)
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -127,6 +160,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Tool image pipeline (apps.tools.images): background threads per worker process
+IMAGE_PIPELINE_WORKERS = config('IMAGE_PIPELINE_WORKERS', default=2, cast=int)
+# Placeholders still processing after this long are failed by gc_images
+IMAGE_PROCESSING_TIMEOUT_MINUTES = config('IMAGE_PROCESSING_TIMEOUT_MINUTES', default=30, cast=int)
+
 # Default primary key
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -137,6 +175,7 @@ CORS_ALLOWED_ORIGINS = config(
     cast=lambda v: [s.strip() for s in v.split(',')]
 )
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Django REST Framework
 REST_FRAMEWORK = {
@@ -146,7 +185,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.HybridPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -170,6 +209,29 @@ RAZORPAY_KEY_ID = config('RAZORPAY_KEY_ID', default='')
 RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='')
 RAZORPAY_WEBHOOK_SECRET = config('RAZORPAY_WEBHOOK_SECRET', default='')
 
+# Notification delivery channels drained by `manage.py dispatch_notifications`
+# (apps.bookings.channels); comma-separated dotted paths
+NOTIFICATION_CHANNELS = config(
+    'NOTIFICATION_CHANNELS',
+    default='apps.bookings.channels.LogChannel',
+    cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+
+# Minutes a pending booking request reserves its window before it expires
+# (apps.bookings.holds; swept by `manage.py release_expired_holds`)
+BOOKING_HOLD_MINUTES = config('BOOKING_HOLD_MINUTES', default=60, cast=int)
+
+# Idempotency-Key support for booking/payment writes (apps.bookings.idempotency)
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+IDEMPOTENCY_LOCK_SECONDS = config('IDEMPOTENCY_LOCK_SECONDS', default=300, cast=int)
+
+# Server-sent events stream (apps.bookings.events), held open under ASGI
+EVENT_STREAM_POLL_SECONDS = config('EVENT_STREAM_POLL_SECONDS', default=2, cast=float)
+EVENT_STREAM_KEEPALIVE_SECONDS = config('EVENT_STREAM_KEEPALIVE_SECONDS', default=15, cast=float)
+EVENT_STREAM_RETRY_MS = config('EVENT_STREAM_RETRY_MS', default=3000, cast=int)
+EVENT_RETENTION_HOURS = config('EVENT_RETENTION_HOURS', default=24, cast=int)
+EVENT_STREAM_TICKET_SECONDS = config('EVENT_STREAM_TICKET_SECONDS', default=30, cast=int)
+
 # One-time admin setup secret
 SETUP_SECRET = config('SETUP_SECRET', default='')
 
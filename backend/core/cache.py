@@ -0,0 +1,105 @@
+"""
+Response caching for hot read endpoints.
+
+Cached responses are keyed on the view, action, request path and sorted
+query string, the caller's scope and the current version of every cache
+namespace the view depends on. Writes never delete keys; they bump the
+namespace version (see ``bump``) so every dependent entry is skipped at
+once and ages out on its own. Model signal receivers in the shops and tools
+apps bump namespaces for saves/deletes, and code that writes with
+``QuerySet.update()`` (inventory, ratings, listing state) bumps explicitly.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+NAMESPACES = ('tools', 'shops', 'categories', 'reviews', 'suggest')
+
+
+def _version_key(namespace):
+    return f'cache-ns:{namespace}'
+
+
+def namespace_versions(namespaces):
+    """Return the current version of each namespace, in order"""
+    keys = [_version_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    return [found.get(key, 0) for key in keys]
+
+
+def _bump_now(namespaces):
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        # Version keys don't expire; if one is evicted anyway, entries cached
+        # under its earlier values still age out after CACHE_TTL
+        if not cache.add(key, 1, timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout=None)
+
+
+def bump(*namespaces):
+    """
+    Invalidate every cached response depending on ``namespaces``. Deferred
+    until the surrounding transaction commits so a concurrent request cannot
+    re-cache the pre-commit state under the new version.
+    """
+    transaction.on_commit(lambda: _bump_now(namespaces))
+
+
+class CachedResponseMixin:
+    """
+    Serve ``list``/``retrieve`` responses from the cache.
+
+    Views declare the namespaces their payload depends on in
+    ``cache_namespaces``. ``cache_shared = True`` means the payload is the
+    same for every caller, so one entry serves everybody; otherwise entries
+    are scoped per user.
+    """
+
+    cache_namespaces = ()
+    cache_shared = False
+    cache_timeout = None
+    # Response headers stored with the payload and replayed on a hit
+    cache_headers = ()
+
+    def get_cache_scope(self, request):
+        if self.cache_shared or not request.user.is_authenticated:
+            return 'public'
+        return f'user:{request.user.pk}'
+
+    def get_cache_key(self, request):
+        query = '&'.join(
+            f'{key}={value}'
+            for key in sorted(request.query_params)
+            for value in request.query_params.getlist(key)
+        )
+        digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+        versions = '.'.join(str(v) for v in namespace_versions(self.cache_namespaces))
+        return f'response:{type(self).__name__}:{self.action}:{versions}:{self.get_cache_scope(request)}:{digest}'
+
+    def cached_response(self, request, build):
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            response = Response(data, headers=headers)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = build()
+        if response.status_code == 200:
+            timeout = self.cache_timeout if self.cache_timeout is not None else settings.CACHE_TTL
+            headers = {name: response[name] for name in self.cache_headers if name in response}
+            cache.set(key, (response.data, headers), timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,189 @@
+"""
+Conditional GET (ETag / Last-Modified) for list and retrieve.
+
+Validators come from the primary keys and ``updated_at`` of the rows a
+response shows (the current page for list, the object for retrieve),
+combined with the response cache namespace versions so that changes made
+with ``QuerySet.update()`` also change the ETag.
+
+* Plain requests compute them from the rows the response is built from, at
+  no extra query. Behind CachedResponseMixin they are stored with the
+  cached payload and replayed on a hit.
+* Conditional requests (``If-None-Match`` / ``If-Modified-Since``) are
+  answered from the cache when possible. Otherwise the page is paginated
+  once over a light query that only reads keys and timestamps, and a match
+  returns 304 before any serializer runs; on a mismatch only that page's
+  rows are loaded in full and serialized, without paginating again.
+"""
+import hashlib
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from core.cache import namespace_versions
+from core.middleware import render_timer
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag/Last-Modified to ``list`` and ``retrieve`` and answer
+    conditional requests with 304. Place before CachedResponseMixin so the
+    validators are cached with the payload. Models need an ``updated_at``
+    field.
+    """
+
+    last_modified_field = 'updated_at'
+    cache_headers = ('ETag', 'Last-Modified')
+    _validator_rows = None
+
+    def _light(self, queryset):
+        """
+        The same rows with only keys, timestamps and ordering fields loaded
+        (cursor pagination reads its position from the ordering field), and
+        without the serializer's eager loading.
+        """
+        fields = {'pk', self.last_modified_field}
+        for name in queryset.query.order_by:
+            if isinstance(name, str):
+                try:
+                    fields.add(queryset.model._meta.get_field(name.lstrip('-')).name)
+                except FieldDoesNotExist:
+                    pass
+        return queryset.select_related(None).prefetch_related(None).only(*fields)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if self.action == 'list':
+            self._validator_rows = page
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.action == 'retrieve':
+            self._validator_rows = [obj]
+        return obj
+
+    def _validators(self, rows):
+        rows = list(rows)
+        stamps = [getattr(row, self.last_modified_field) for row in rows]
+        last_modified = max(stamps) if stamps else None
+        versions = namespace_versions(getattr(self, 'cache_namespaces', ()))
+        digest = hashlib.md5('|'.join([
+            self.request.get_full_path(),
+            '.'.join(str(v) for v in versions),
+            ','.join(str(row.pk) for row in rows),
+            last_modified.isoformat() if last_modified else '',
+        ]).encode()).hexdigest()
+        return f'W/{quote_etag(digest)}', last_modified
+
+    def _set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def _with_validators(self, response):
+        """Set the validators of a freshly built 200 response"""
+        if response.status_code != status.HTTP_200_OK or 'ETag' in response:
+            return response
+        rows = self._validator_rows
+        if rows is None:
+            # Unpaginated list: the serializer read the queryset itself
+            rows = self._light(self.filter_queryset(self.get_queryset()))
+        return self._set_validators(response, *self._validators(rows))
+
+    def _is_conditional(self, request):
+        return 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+
+    def _not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            plain = etag.removeprefix('W/')
+            return '*' in etags or any(tag.removeprefix('W/') == plain for tag in etags)
+
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        modified = parse_http_date_safe(last_modified or '')
+        return since is not None and modified is not None and modified <= since
+
+    def _not_modified_response(self, etag, last_modified):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = last_modified
+        return response
+
+    def _conditional(self, request, response):
+        response = self._with_validators(response)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        etag, last_modified = response['ETag'], response.get('Last-Modified')
+        if not self._not_modified(request, etag, last_modified):
+            return response
+        return self._not_modified_response(etag, last_modified)
+
+    def _check_first(self, request, rows, build):
+        """304 for ``rows`` when the request matches, else ``build()`` with their validators"""
+        etag, last_modified = self._validators(rows)
+        header = http_date(last_modified.timestamp()) if last_modified is not None else None
+        if self._not_modified(request, etag, header):
+            return self._not_modified_response(etag, header)
+        return self._set_validators(build(), etag, last_modified)
+
+    def _through_cache(self, request, build):
+        cached_response = getattr(super(), 'cached_response', None)
+        if cached_response is None:
+            return build()
+        return cached_response(request, build)
+
+    def _list_page(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(self._light(queryset))
+        rows = page if page is not None else list(self._light(queryset))
+
+        def build():
+            # Load the page's rows in full, in page order
+            by_pk = queryset.in_bulk([row.pk for row in rows])
+            serializer = self.get_serializer([by_pk[row.pk] for row in rows if row.pk in by_pk], many=True)
+            with render_timer(request):
+                data = serializer.data
+            if page is not None:
+                return self.get_paginated_response(data)
+            return Response(data)
+
+        return self._check_first(request, rows, build)
+
+    def _retrieve_object(self, request, **kwargs):
+        def build():
+            serializer = self.get_serializer(self.get_object())
+            with render_timer(request):
+                return Response(serializer.data)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self._light(self.filter_queryset(self.get_queryset()))
+        try:
+            rows = list(queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})[:1])
+        except (TypeError, ValueError, DjangoValidationError):
+            # Malformed lookup: let get_object() produce the 404
+            return build()
+        if not rows:
+            return build()
+        return self._check_first(request, rows, build)
+
+    def cached_response(self, request, build):
+        # Validators are set before the response is cached so a hit replays them
+        return super().cached_response(request, lambda: self._with_validators(build()))
+
+    def list(self, request, *args, **kwargs):
+        if self._is_conditional(request):
+            response = self._through_cache(request, lambda: self._list_page(request))
+        else:
+            response = super().list(request, *args, **kwargs)
+        return self._conditional(request, response)
+
+    def retrieve(self, request, *args, **kwargs):
+        if self._is_conditional(request):
+            response = self._through_cache(request, lambda: self._retrieve_object(request, **kwargs))
+        else:
+            response = super().retrieve(request, *args, **kwargs)
+        return self._conditional(request, response)
@@ -0,0 +1,144 @@
+import functools
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+from core import perf
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their wall time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+    @contextmanager
+    def installed(self):
+        """Count the queries run by this thread's connections"""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                if self not in connection.execute_wrappers:
+                    stack.enter_context(connection.execute_wrapper(self))
+            yield
+
+    def wrap(self, func):
+        """``func`` counting its queries, for work handed to other threads"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.installed():
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def track_queries(request, func):
+    """
+    ``func`` with its queries counted towards ``request``, for sync work an
+    async view runs through ``sync_to_async`` (which may use another thread)
+    """
+    timer = getattr(request, '_perf_timer', None)
+    return timer.wrap(func) if timer is not None else func
+
+
+@contextmanager
+def render_timer(request):
+    """
+    Count the duration of the block as render time of ``request``, less the
+    queries it runs (lazy loads stay DB time)
+    """
+    request = getattr(request, '_request', request)
+    timer = getattr(request, '_perf_timer', None)
+    db_start = timer.duration if timer is not None else 0.0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timer is not None:
+            db = timer.duration - db_start
+            request._perf_render += time.perf_counter() - start - db
+
+
+class PerformanceMiddleware:
+    """
+    Record per-request query count, DB time, render time (serializer output
+    and response rendering) and total time. Results go into the core.perf
+    ring buffer and, when PERF_SERVER_TIMING is on, a Server-Timing response
+    header. Streaming responses are recorded once their content has been
+    sent, without the header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        request._perf_timer = timer
+        request._perf_render = 0.0
+        start = time.perf_counter()
+
+        with timer.installed():
+            response = self.get_response(request)
+
+        if response.streaming:
+            response.streaming_content = self._measure_stream(request, response, timer, start)
+            return response
+
+        total_ms, db_ms, render_ms = self._record(request, timer, start)
+        if getattr(settings, 'PERF_SERVER_TIMING', True):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={db_ms:.2f};desc="{timer.count} queries"',
+                f'render;dur={render_ms:.2f}',
+                f'app;dur={max(total_ms - db_ms - render_ms, 0):.2f}',
+                f'total;dur={total_ms:.2f}',
+            ])
+        return response
+
+    def _record(self, request, timer, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = timer.duration * 1000
+        render_ms = request._perf_render * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        route = f"{request.method} {match.view_name if match else 'unresolved'}"
+        perf.record(perf.Sample(route, total_ms, db_ms, render_ms, timer.count))
+        return total_ms, db_ms, render_ms
+
+    def _measure_stream(self, request, response, timer, start):
+        content = response.streaming_content
+        if response.is_async:
+            async def measured():
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    self._record(request, timer, start)
+        else:
+            def measured():
+                try:
+                    while True:
+                        with timer.installed():
+                            chunk = next(content, None)
+                        if chunk is None:
+                            break
+                        yield chunk
+                finally:
+                    self._record(request, timer, start)
+        return measured()
+
+    def process_template_response(self, request, response):
+        """Time the render step of DRF/template responses"""
+        render_start = time.perf_counter()
+
+        def finished(rendered):
+            request._perf_render += time.perf_counter() - render_start
+
+        response.add_post_render_callback(finished)
+        return response
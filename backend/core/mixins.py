@@ -0,0 +1,44 @@
+from rest_framework.response import Response
+from core.middleware import render_timer
+
+
+class EagerLoadingMixin:
+    """
+    Apply the serializer's declared query needs to viewset querysets.
+
+    Serializers opt in with a ``setup_eager_loading(queryset, prefix='')``
+    classmethod that adds the select_related/prefetch_related/annotations
+    they (and their nested serializers) read, so a page costs a constant
+    number of queries regardless of its size. ``get_queryset()`` applies
+    it; views that override ``get_queryset()`` pass their queryset through
+    ``eager_load()``.
+
+    ``list`` and ``retrieve`` read serializer output through
+    ``serialized_data()``, so the render figure of PerformanceMiddleware
+    includes ``to_representation``.
+    """
+
+    def eager_load(self, queryset):
+        setup = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+        return setup(queryset) if setup else queryset
+
+    def get_queryset(self):
+        return self.eager_load(super().get_queryset())
+
+    def serialized_data(self, serializer):
+        """``serializer.data``, counted as render time of the request"""
+        with render_timer(self.request):
+            return serializer.data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(self.serialized_data(serializer))
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(self.serialized_data(serializer))
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        return Response(self.serialized_data(serializer))
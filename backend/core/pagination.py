@@ -0,0 +1,65 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination on -created_at with a primary-key tie-breaker"""
+
+    ordering = ('-created_at', '-pk')
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Honour ?ordering / the view's default via OrderingFilter when present,
+        falling back to -created_at, and always end with a pk tie-breaker.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        ordering = tuple(ordering or self.ordering)
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            tie_breaker = '-pk' if ordering[0].startswith('-') else 'pk'
+            ordering += (tie_breaker,)
+        return ordering
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; keyset (cursor) pagination for list
+    actions when the client sends ``?pagination=cursor`` or a ``cursor``.
+    Cursor mode walks the created_at index and never issues a COUNT query.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_query_param = KeysetPagination.cursor_query_param
+
+    def __init__(self):
+        self.keyset = None
+
+    def wants_cursor(self, request, view):
+        if getattr(view, 'action', None) != 'list':
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor' or
+            self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_cursor(request, view):
+            keyset = KeysetPagination()
+            position_field = keyset.get_ordering(request, queryset, view)[0].lstrip('-')
+            try:
+                queryset.model._meta.get_field(position_field)
+            except FieldDoesNotExist:
+                pass
+            else:
+                self.keyset = keyset
+                return keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,53 @@
+"""
+In-process request performance samples.
+
+Each worker keeps the most recent PERF_SAMPLE_SIZE requests in a bounded ring
+buffer; summaries are computed on demand for the admin perf endpoint.
+"""
+from collections import defaultdict, deque, namedtuple
+from django.conf import settings
+
+Sample = namedtuple('Sample', ['route', 'total_ms', 'db_ms', 'render_ms', 'queries'])
+
+_samples = deque(maxlen=getattr(settings, 'PERF_SAMPLE_SIZE', 5000))
+
+
+def record(sample):
+    """Append a sample, evicting the oldest once the buffer is full"""
+    _samples.append(sample)
+
+
+def clear():
+    _samples.clear()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summary():
+    """Per-route latency percentiles and average query/DB cost"""
+    by_route = defaultdict(list)
+    for sample in list(_samples):
+        by_route[sample.route].append(sample)
+
+    routes = []
+    for route, samples in by_route.items():
+        totals = sorted(sample.total_ms for sample in samples)
+        count = len(samples)
+        routes.append({
+            'route': route,
+            'count': count,
+            'p50_ms': round(percentile(totals, 50), 2),
+            'p95_ms': round(percentile(totals, 95), 2),
+            'p99_ms': round(percentile(totals, 99), 2),
+            'avg_queries': round(sum(sample.queries for sample in samples) / count, 2),
+            'avg_db_ms': round(sum(sample.db_ms for sample in samples) / count, 2),
+            'avg_render_ms': round(sum(sample.render_ms for sample in samples) / count, 2),
+        })
+    routes.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return routes
@@ -94,6 +94,15 @@ export default function BookingsPage() {
         }
     };
 
+    const handleMarkReturned = async (id: string) => {
+        try {
+            await api.markBookingReturned(accessToken!, id);
+            loadBookings();
+        } catch (err: any) {
+            alert('Failed to mark as returned: ' + err.message);
+        }
+    };
+
     const handlePayClick = (booking: Booking) => {
         setBookingToPay(booking);
         setShowPaymentModal(true);
@@ -253,6 +262,15 @@ export default function BookingsPage() {
                                                 </button>
                                             )}
 
+                                            {booking.status === 'active' && !isRenter && (
+                                                <button
+                                                    onClick={() => handleMarkReturned(booking.id)}
+                                                    className="w-full border border-gray-700 text-gray-300 hover:bg-white/5 py-3 text-xs font-bold uppercase tracking-widest transition-colors mt-4"
+                                                >
+                                                    Mark Returned
+                                                </button>
+                                            )}
+
                                             {booking.status === 'pending' && (
                                                 <div className="w-full space-y-3 mt-4">
                                                     {!isRenter && (
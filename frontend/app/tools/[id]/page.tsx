@@ -97,7 +97,7 @@ export default function ToolDetailsPage() {
                             <div className="absolute inset-0 bg-[radial-gradient(circle_at_center,_var(--tw-gradient-stops))] from-white/5 to-transparent opacity-0 group-hover:opacity-100 transition-opacity duration-500"></div>
                             {tool.images && tool.images.length > 0 ? (
                                 <img
-                                    src={getImageUrl(tool.images[0])}
+                                    src={getImageUrl(tool.images[0], 'full')}
                                     alt={tool.name}
                                     className="w-full h-full object-contain p-8 group-hover:scale-105 transition-transform duration-500"
                                 />
@@ -6,7 +6,7 @@ import { api } from '@/lib/api';
 import { Search, MapPin, Package, IndianRupee, ShieldCheck, Crosshair, Loader2 } from 'lucide-react';
 import TiltCard from '@/components/ui/TiltCard';
 import { Skeleton } from '@/components/ui/Skeleton';
-import { getImageUrl } from '@/lib/utils'; // Added import
+import { getImageUrl, type ToolImage } from '@/lib/utils'; // Added import
 
 interface Tool {
     id: string;
@@ -22,7 +22,7 @@ interface Tool {
     category?: {
         name: string;
     };
-    images: string[];
+    images: (string | ToolImage)[];
 }
 
 export default function ToolsPage() {
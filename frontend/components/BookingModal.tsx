@@ -50,6 +50,21 @@ export default function BookingModal({ tool, isOpen, onClose }: BookingModalProp
 
             setDuration(days);
             setTotalPrice((tool.price_per_day * days * quantity) + Number(tool.deposit_amount));
+
+            // Replace the estimate with the server's exact price (week/day/hour rates)
+            let cancelled = false;
+            api.quoteTools([{
+                tool_id: tool.id,
+                start_datetime: start.toISOString(),
+                end_datetime: end.toISOString(),
+                quantity,
+            }]).then((data) => {
+                const quote = data.quotes[0];
+                if (!cancelled && quote && !quote.error) {
+                    setTotalPrice(Number(quote.total_amount));
+                }
+            }).catch(() => { /* keep the estimate */ });
+            return () => { cancelled = true; };
         }
     }, [startDate, endDate, quantity, tool]);
 
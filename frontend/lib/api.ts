@@ -159,6 +159,13 @@ class APIClient {
         return this.request(`/api/tools/${id}/`);
     }
 
+    async quoteTools(items: { tool_id: string; start_datetime: string; end_datetime: string; quantity?: number }[]) {
+        return this.request<{ quotes: { tool_id: string; total_amount?: string; error?: string }[] }>('/api/tools/quote/', {
+            method: 'POST',
+            body: JSON.stringify({ items }),
+        });
+    }
+
     async getMyTools(token: string) {
         return this.request('/api/tools/my_tools/', { token });
     }
@@ -226,6 +233,13 @@ class APIClient {
         });
     }
 
+    async markBookingReturned(token: string, id: string) {
+        return this.request(`/api/bookings/${id}/mark_returned/`, {
+            method: 'POST',
+            token,
+        });
+    }
+
     // Payments
     async createPayment(token: string, bookingId: string) {
         return this.request<{ order_id: string; amount: number; currency: string; key: string }>(
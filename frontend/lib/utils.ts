@@ -6,7 +6,22 @@ export function cn(...inputs: ClassValue[]) {
     return twMerge(clsx(inputs));
 }
 
-export function getImageUrl(path: string | null | undefined) {
+// Tool images are processed off-request into WebP variants; entries from
+// before that are plain URL strings
+export type ImageVariant = 'thumb' | 'medium' | 'full';
+
+export interface ToolImage {
+    id: string;
+    status: 'processing' | 'ready' | 'failed';
+    thumb?: string;
+    medium?: string;
+    full?: string;
+    width?: number;
+    height?: number;
+}
+
+export function getImageUrl(image: string | ToolImage | null | undefined, variant: ImageVariant = 'medium') {
+    const path = typeof image === 'string' ? image : image?.[variant] || image?.full;
     if (!path) return '';
     if (path.startsWith('http') || path.startsWith('blob:')) return path;
     const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';